@@ -30,6 +30,10 @@ def create_app():
     # Cargamos la configuración desde el archivo config.py
     app.config.from_object('app.config.Config')
 
+    # Codificación JSON de las respuestas (orjson si está instalado)
+    from .json_provider import init_json
+    init_json(app)
+
     # Evita redirects 308 por slash final (los preflight OPTIONS no permiten redirects)
     app.url_map.strict_slashes = False
 
@@ -45,6 +49,14 @@ def create_app():
     # Inicializamos Flask-Mail con la app
     mail.init_app(app)
 
+    # Caché de respuestas de los endpoints del catálogo
+    from .cache import cache
+    cache.init_app(app)
+
+    # Índice en memoria para el autocompletado de búsqueda
+    from .autocomplete import autocomplete_index
+    autocomplete_index.init_app(app)
+
     # CORS
     # En el navegador, si el origen del frontend no está permitido exactamente,
     # el backend puede procesar el POST (crear el usuario) pero el browser bloqueará la respuesta.
@@ -71,4 +83,17 @@ def create_app():
     from .routes import register_blueprints
     register_blueprints(app)
 
+    # Cabecera con la cantidad de consultas SQL por request (solo si se habilita)
+    if app.config.get('SQL_QUERY_COUNT_HEADER'):
+        from .utils import register_query_counter
+        register_query_counter(app)
+
+    # Compresión gzip/brotli de las respuestas según Accept-Encoding
+    from .compression import init_compression
+    init_compression(app)
+
+    # Registramos los comandos de mantenimiento (flask rebuild-ratings, etc.)
+    from .commands import register_commands
+    register_commands(app)
+
     return app
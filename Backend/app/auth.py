@@ -10,6 +10,7 @@ import re
 from .models import User, db
 from app.__init__ import mail
 from app.utils import generate_token, get_expiration
+from app.guest_cart import merge_guest_cart_on_login
 from flask_mail import Message
 import os
 import time
@@ -138,6 +139,9 @@ def login():
     - username: string (or email)
     - password: string
     
+    Optional:
+    - guest_cart: guest cart token, merged into the user's cart ('cart_merged' in the response)
+    
     Returns:
     - 200: Login successful with tokens
     - 401: Invalid credentials
@@ -163,12 +167,17 @@ def login():
         access_token = create_access_token(identity=str(user.id))
         refresh_token = create_refresh_token(identity=str(user.id))
         
-        return jsonify({
+        response = {
             'message': 'Login successful',
             'user': user.serialize(),
             'access_token': access_token,
             'refresh_token': refresh_token
-        }), 200
+        }
+        if data.get('guest_cart'):
+            # Merge the guest cart into the user's cart; a failed merge does not fail the login
+            response['cart_merged'] = merge_guest_cart_on_login(user.id, data['guest_cart'])
+        
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
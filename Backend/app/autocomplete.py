@@ -0,0 +1,192 @@
+# autocomplete.py
+# Índice en memoria para el autocompletado de la búsqueda.
+#
+# Guarda los nombres de productos activos, categorías y marcas en listas
+# ordenadas y responde por prefijo con bisect, sin tocar la base de datos.
+# De los productos solo guarda id, nombre y marca: el precio, el stock y el
+# resto de los campos cambian sin pasar por el índice (compras, descuentos),
+# así que la ruta los lee de la base para los IDs encontrados.
+# Se carga en el primer uso y se actualiza de forma incremental desde las
+# rutas de administración. Cada cierto tiempo (AUTOCOMPLETE_REFRESH_SECONDS)
+# se recarga completo para recoger cambios hechos por otros procesos.
+
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from threading import RLock
+from flask import current_app
+
+
+def normalize(text):
+    """Minúsculas y sin acentos, para comparar prefijos"""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def product_entry(product_id, name, brand):
+    """Lo que el índice guarda de un producto"""
+    return {'id': product_id, 'name': name, 'brand': brand}
+
+
+def index_keys(name):
+    """
+    Claves de un nombre: el nombre completo desde el inicio de cada palabra,
+    así 'galaxy' encuentra 'Samsung Galaxy S23'.
+    """
+    words = normalize(name).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class PrefixIndex:
+    """Lista ordenada de (clave, id) con búsqueda por prefijo"""
+
+    def __init__(self):
+        self._keys = []
+        self._items = {}  # id -> (payload, claves)
+
+    def __len__(self):
+        return len(self._items)
+
+    def load(self, entries):
+        """Carga masiva: entries es una lista de (id, nombre, payload)"""
+        keys = []
+        items = {}
+        for item_id, name, payload in entries:
+            item_keys = index_keys(name)
+            items[item_id] = (payload, item_keys)
+            keys.extend((key, item_id) for key in item_keys)
+        keys.sort()
+        self._keys = keys
+        self._items = items
+
+    def add(self, item_id, name, payload):
+        self.remove(item_id)
+        item_keys = index_keys(name)
+        for key in item_keys:
+            insort(self._keys, (key, item_id))
+        self._items[item_id] = (payload, item_keys)
+
+    def remove(self, item_id):
+        entry = self._items.pop(item_id, None)
+        if not entry:
+            return
+        for key in entry[1]:
+            position = bisect_left(self._keys, (key, item_id))
+            if position < len(self._keys) and self._keys[position] == (key, item_id):
+                del self._keys[position]
+
+    def search(self, prefix, limit):
+        """Devuelve hasta `limit` payloads cuyo nombre tenga una palabra que empiece con `prefix`"""
+        prefix = normalize(prefix)
+        results = []
+        seen = set()
+        position = bisect_left(self._keys, (prefix,))
+        while position < len(self._keys) and len(results) < limit:
+            key, item_id = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            if item_id not in seen:
+                seen.add(item_id)
+                results.append(self._items[item_id][0])
+            position += 1
+        return results
+
+
+class AutocompleteIndex:
+    """Índices de prefijos para productos, categorías y marcas"""
+
+    def __init__(self, refresh_seconds=300):
+        self.refresh_seconds = refresh_seconds
+        self.products = PrefixIndex()
+        self.categories = PrefixIndex()
+        self.brands = PrefixIndex()
+        self._loaded_at = None
+        self._lock = RLock()
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('AUTOCOMPLETE_REFRESH_SECONDS', self.refresh_seconds)
+        app.extensions['autocomplete'] = self
+
+    def invalidate(self):
+        """Fuerza una recarga completa en el próximo uso"""
+        with self._lock:
+            self._loaded_at = None
+
+    def reload(self):
+        """Carga todos los nombres desde la base de datos"""
+        from . import db
+        from .models import Product, Category, Brand
+        from .loading import category_options
+
+        products = db.session.query(Product.id, Product.name, Brand.name).outerjoin(
+            Brand, Product.brand_id == Brand.id
+        ).filter(Product.is_active == True).all()
+        categories = Category.query.options(*category_options()).all()
+        brands = Brand.query.all()
+
+        with self._lock:
+            self.products.load([
+                (product_id, name, product_entry(product_id, name, brand)) for product_id, name, brand in products
+            ])
+            self.categories.load([(c.id, c.name, c.serialize()) for c in categories])
+            self.brands.load([(b.id, b.name, b.serialize()) for b in brands])
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_seconds:
+            self.reload()
+
+    def search(self, query, product_limit=4, category_limit=2, brand_limit=2):
+        """Productos ({'id', 'name', 'brand'}), categorías y marcas que coinciden con el prefijo"""
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                'products': self.products.search(query, product_limit),
+                'categories': self.categories.search(query, category_limit),
+                'brands': self.brands.search(query, brand_limit)
+            }
+
+    # ---- Actualizaciones incrementales (llamar después del commit) ----
+
+    def update_product(self, product):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            if product.is_active:
+                brand = product.brand.name if product.brand else None
+                self.products.add(product.id, product.name, product_entry(product.id, product.name, brand))
+            else:
+                self.products.remove(product.id)
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self.products.remove(product_id)
+
+    def update_category(self, category):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self.categories.add(category.id, category.name, category.serialize())
+
+    def remove_category(self, category_id):
+        with self._lock:
+            self.categories.remove(category_id)
+
+    def update_brand(self, brand):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self.brands.add(brand.id, brand.name, brand.serialize())
+
+    def remove_brand(self, brand_id):
+        with self._lock:
+            self.brands.remove(brand_id)
+
+
+# Instancia única, se registra en create_app con init_app
+autocomplete_index = AutocompleteIndex()
+
+
+def get_autocomplete_index():
+    return current_app.extensions['autocomplete']
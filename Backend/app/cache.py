@@ -0,0 +1,287 @@
+# cache.py
+# Caché de respuestas para los endpoints de lectura del catálogo.
+#
+# - MemoryBackend: TTL + LRU en memoria del proceso (por defecto). Solo sirve
+#   con un único proceso: un bump() en un worker no invalida las entradas de
+#   los demás, que seguirían sirviendo datos viejos hasta el TTL.
+# - RedisBackend: cualquier cliente compatible con Redis (get/set/incr/delete),
+#   por ejemplo redis.Redis o un fake en memoria para pruebas. Es el que hay
+#   que usar con varios workers (gunicorn -w N).
+# - NullBackend: no guarda nada. init_app lo elige (con un warning) cuando
+#   CACHE_WORKERS > 1 y no hay un backend compartido: la app arranca igual
+#   (migraciones, comandos de la CLI) y los endpoints responden sin caché ni ETag.
+#
+# La invalidación es por versión: cada respuesta se guarda con la versión
+# actual de sus "namespaces" (por ejemplo 'catalog') en la clave. Las rutas
+# de escritura llaman a cache.bump('catalog') y las entradas viejas dejan de
+# usarse (expiran por TTL o las descarta el LRU).
+#
+# Las mismas versiones generan los ETags de los endpoints (cache.etag), así
+# un GET condicional con If-None-Match se responde con 304 sin consultar la
+# base de datos ni codificar JSON. Se aceptan también los ETags con el sufijo
+# de compresión (app/compression.py).
+
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from urllib.parse import urlencode
+from flask import request, current_app, Response
+from .compression import ETAG_SUFFIXES
+
+
+class MemoryBackend:
+    """Caché TTL + LRU en memoria del proceso"""
+
+    # Las versiones viven en cada proceso, no se comparten entre workers
+    shared = False
+    enabled = True
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clave -> (expira_en, valor)
+        self._counters = {}            # Las versiones no se descartan por LRU
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """Caché en Redis (o cualquier cliente con get/set/incr/delete)"""
+
+    shared = True
+    enabled = True
+
+    def __init__(self, client, prefix='drshopper:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, timeout):
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(timeout))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return int(self.client.incr(self.prefix + key))
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def clear(self):
+        # Con versiones no hace falta borrar claves: basta con hacer bump()
+        pass
+
+
+class NullBackend:
+    """Caché desactivada: no guarda respuestas ni versiones"""
+
+    shared = False
+    enabled = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr(self, key):
+        return 0
+
+    def counter(self, key):
+        return 0
+
+    def clear(self):
+        pass
+
+
+class ResponseCache:
+    """Caché de respuestas JSON con invalidación por versión"""
+
+    def __init__(self):
+        self.backend = None
+        self.default_timeout = 300
+        self.hits = 0
+        self.misses = 0
+        self.etag_salt = ''
+        self._stats_lock = Lock()  # Los contadores se actualizan desde varios threads
+
+    def init_app(self, app):
+        self.default_timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+
+        if backend == 'redis':
+            try:
+                import redis
+                client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+                self.backend = RedisBackend(client)
+            except ImportError:
+                app.logger.warning('CACHE_BACKEND=redis pero el paquete redis no está instalado; se usa caché en memoria')
+                self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 512))
+        else:
+            self.backend = MemoryBackend(app.config.get('CACHE_MAX_ENTRIES', 512))
+
+        workers = app.config.get('CACHE_WORKERS', 1)
+        if workers > 1 and not self.backend.shared:
+            # No se corta el arranque: create_app también corre en las
+            # migraciones y los comandos de la CLI
+            app.logger.warning(
+                f'CACHE_WORKERS={workers}: con varios procesos la caché en memoria serviría datos '
+                'viejos después de cada escritura; la caché de respuestas y los ETags quedan '
+                'desactivados. Configurar CACHE_BACKEND=redis (y el paquete redis) para usarlos'
+            )
+            self.backend = NullBackend()
+
+        # Si las versiones son locales al proceso, un ETag de otro worker no sirve:
+        # agregamos un token por proceso para que nunca coincidan por error
+        self.etag_salt = app.config.get('ETAG_SALT', '')
+        if not self.backend.shared:
+            self.etag_salt += uuid.uuid4().hex
+
+        app.extensions['response_cache'] = self
+
+    def version(self, namespace):
+        return self.backend.counter(f'version:{namespace}')
+
+    def bump(self, *namespaces):
+        """Invalida todas las respuestas guardadas bajo estos namespaces"""
+        for namespace in namespaces:
+            self.backend.incr(f'version:{namespace}')
+
+    def make_key(self, namespaces):
+        """Clave: endpoint + versiones de los namespaces + query args normalizados"""
+        versions = ','.join(f'{ns}={self.version(ns)}' for ns in namespaces)
+        args = urlencode(sorted(request.args.items(multi=True)))
+        return f'response:{request.endpoint}:{request.view_args or ""}:{versions}:{args}'
+
+    def make_etag(self, namespaces):
+        """ETag fuerte derivado de la clave de caché (cambia con cada bump)"""
+        return hashlib.sha1(f'{self.etag_salt}:{self.make_key(namespaces)}'.encode()).hexdigest()
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0
+        }
+
+    def cached(self, *namespaces, timeout=None):
+        """
+        Decorador para cachear las respuestas 200 de un endpoint GET.
+
+        Args:
+            *namespaces: Namespaces cuya versión forma parte de la clave
+            timeout (int): Segundos de vida (por defecto CACHE_DEFAULT_TIMEOUT)
+        """
+        def wrapper(fn):
+            @wraps(fn)
+            def decorator(*args, **kwargs):
+                if not self.backend.enabled:
+                    return fn(*args, **kwargs)
+
+                key = self.make_key(namespaces)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self._count(hit=True)
+                    return Response(entry['data'], status=200, mimetype='application/json')
+
+                self._count(hit=False)
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code == 200 and response.mimetype == 'application/json':
+                    self.backend.set(
+                        key,
+                        {'data': response.get_data(as_text=True)},
+                        timeout or self.default_timeout
+                    )
+                return response
+            return decorator
+        return wrapper
+
+    def etag(self, *namespaces):
+        """
+        Decorador que agrega un ETag a las respuestas 200 y responde 304 si
+        el cliente manda un If-None-Match que coincide.
+
+        Args:
+            *namespaces: Namespaces de los que depende la respuesta
+        """
+        def wrapper(fn):
+            @wraps(fn)
+            def decorator(*args, **kwargs):
+                # Sin versiones compartidas un ETag podría no cambiar después de una escritura
+                if not self.backend.enabled:
+                    return fn(*args, **kwargs)
+
+                etag = self.make_etag(namespaces)
+                # Las respuestas comprimidas llevan el ETag con sufijo (-gzip / -br)
+                for candidate in (etag, *(etag + suffix for suffix in ETAG_SUFFIXES.values())):
+                    if request.if_none_match.contains(candidate):
+                        response = Response(status=304)
+                        response.set_etag(candidate)
+                        return response
+
+                response = current_app.make_response(fn(*args, **kwargs))
+                if response.status_code == 200:
+                    response.set_etag(etag)
+                return response
+            return decorator
+        return wrapper
+
+
+# Instancia única, se registra en create_app con init_app
+cache = ResponseCache()
@@ -0,0 +1,322 @@
+# cart.py
+# Lectura y escritura del carrito.
+#
+# El carrito activo se carga con sus items, productos, categorías y marcas
+# en una sola consulta (loading.cart_options) y los totales se calculan en
+# una pasada sobre los items ya cargados, sin consultas perezosas.
+#
+# Agregar un producto es un único INSERT ... ON CONFLICT DO UPDATE (upsert)
+# en PostgreSQL y SQLite, apoyado en la restricción única (cart_id, product_id).
+#
+# La fila Cart se crea recién con el primer producto agregado: leer el
+# carrito nunca escribe (empty_cart devuelve un carrito virtual vacío) y
+# prune_empty_carts borra por lotes los carritos abandonados sin items.
+
+from sqlalchemy import select, insert, delete, func, literal, exists, Integer
+from . import db
+from .loading import cart_options
+from .models import Cart, CartItem, Product
+
+# Operaciones aceptadas por POST /api/cart/batch
+BATCH_OPERATIONS = ('add', 'update', 'remove')
+MAX_BATCH_OPERATIONS = 100
+
+
+class CartError(Exception):
+    """Operación de carrito inválida (status_code es el código HTTP a devolver)"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def load_active_cart(user_id):
+    """
+    Carrito activo del usuario con todo lo que usa su serialización.
+
+    Returns:
+        Cart: El carrito (con cart.items cargado) o None si no tiene uno
+    """
+    return Cart.query.options(*cart_options()).filter(
+        Cart.user_id == user_id,
+        Cart.is_active == True
+    ).order_by(Cart.id).first()
+
+
+def empty_cart(user_id):
+    """
+    Carrito virtual (sin fila en la base de datos) para un usuario que
+    todavía no tiene carrito activo. Mismo formato que Cart.serialize().
+    """
+    return {
+        'id': None,
+        'user_id': int(user_id),
+        'creation_date': None,
+        'is_active': True
+    }
+
+
+def sorted_items(cart):
+    """Items del carrito ordenados por ID (vacío si no hay carrito)"""
+    if cart is None:
+        return []
+    return sorted(cart.items, key=lambda item: item.id)
+
+
+def cart_totals(items):
+    """
+    Totales del carrito en una sola pasada.
+
+    Returns:
+        dict: 'total' (precio de lista), 'final_total' (con descuentos),
+            'savings', 'item_count' (líneas) y 'total_quantity' (unidades)
+    """
+    total = 0
+    final_total = 0
+    total_quantity = 0
+    for item in items:
+        total_quantity += item.quantity
+        if item.product:
+            total += item.quantity * item.product.price
+            final_total += item.quantity * item.product.final_price
+
+    return {
+        'total': total,
+        'final_total': round(final_total, 2),
+        'savings': round(total - final_total, 2),
+        'item_count': len(items),
+        'total_quantity': total_quantity
+    }
+
+
+def upsert_insert():
+    """Función insert del dialecto si soporta ON CONFLICT, o None"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        return postgresql_insert
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert
+    return None
+
+
+def active_cart_id(user_id):
+    """ID del carrito activo del usuario (el mismo que elige load_active_cart)"""
+    return select(func.min(Cart.id)).where(
+        Cart.user_id == user_id,
+        Cart.is_active == True
+    ).scalar_subquery()
+
+
+def add_item(user_id, product_id, quantity):
+    """
+    Suma unidades de un producto al carrito activo del usuario. Solo escribe
+    si el producto existe y tiene stock para la cantidad resultante.
+    No hace commit.
+
+    En PostgreSQL y SQLite es una sola sentencia:
+        INSERT INTO cart_item (cart_id, product_id, quantity)
+        SELECT <carrito activo>, product.id, :quantity FROM product
+        WHERE product.id = :product_id AND product.stock >= :quantity
+        ON CONFLICT (cart_id, product_id) DO UPDATE
+        SET quantity = cart_item.quantity + excluded.quantity
+        WHERE <stock del producto> >= cart_item.quantity + excluded.quantity
+
+    Args:
+        user_id (int): ID del usuario
+        product_id (int): ID del producto
+        quantity (int): Unidades a sumar (mayor a 0)
+
+    Returns:
+        int: Cantidad total del item en el carrito, o None si no se escribió
+            nada (sin carrito activo, producto inexistente o stock insuficiente)
+    """
+    dialect_insert = upsert_insert()
+    if dialect_insert is None:
+        return _add_item_orm(user_id, product_id, quantity)
+
+    cart_item = CartItem.__table__
+    product = Product.__table__
+    cart_id = active_cart_id(user_id)
+
+    source = select(
+        cart_id,
+        product.c.id,
+        literal(quantity, Integer)
+    ).where(
+        product.c.id == product_id,
+        product.c.stock >= quantity,
+        cart_id.isnot(None)
+    )
+
+    statement = dialect_insert(cart_item).from_select(['cart_id', 'product_id', 'quantity'], source)
+    new_quantity = cart_item.c.quantity + statement.excluded.quantity
+    available = select(product.c.stock).where(product.c.id == product_id).scalar_subquery()
+    statement = statement.on_conflict_do_update(
+        index_elements=['cart_id', 'product_id'],
+        set_={'quantity': new_quantity},
+        where=available >= new_quantity
+    ).returning(cart_item.c.quantity)
+
+    return db.session.execute(statement).scalar()
+
+
+def _add_item_orm(user_id, product_id, quantity):
+    """Versión con el ORM para motores sin ON CONFLICT"""
+    product = db.session.get(Product, product_id)
+    cart = Cart.query.filter(Cart.id == active_cart_id(user_id)).first()
+    if not product or not cart:
+        return None
+
+    item = CartItem.query.filter_by(cart_id=cart.id, product_id=product_id).first()
+    new_quantity = quantity + (item.quantity if item else 0)
+    if product.stock < new_quantity:
+        return None
+
+    if item:
+        item.quantity = new_quantity
+    else:
+        db.session.add(CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity))
+    db.session.flush()
+    return new_quantity
+
+
+def parse_operation(position, operation, by_product=False):
+    """
+    Valida una operación del batch y devuelve (op, item_id, product_id, cantidad).
+    Con by_product=True, update y remove también identifican la línea por
+    product_id (carrito de invitado, que no tiene IDs de item).
+    """
+    if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPERATIONS:
+        raise CartError(f'Operación {position}: op debe ser add, update o remove')
+
+    op = operation['op']
+    quantity = None
+    if op in ('add', 'update'):
+        try:
+            quantity = int(operation.get('quantity'))
+        except (TypeError, ValueError):
+            raise CartError(f'Operación {position}: quantity es requerido')
+        if quantity <= 0:
+            raise CartError(f'Operación {position}: la cantidad debe ser mayor a 0')
+
+    key = 'product_id' if op == 'add' or by_product else 'item_id'
+    try:
+        target = int(operation.get(key))
+    except (TypeError, ValueError):
+        raise CartError(f'Operación {position}: {key} es requerido')
+
+    if key == 'product_id':
+        return op, None, target, quantity
+    return op, target, None, quantity
+
+
+def apply_batch(user_id, operations):
+    """
+    Aplica varias operaciones al carrito activo del usuario: valida todas
+    contra el stock con una sola consulta de productos y escribe los cambios
+    juntos. Si algo falla no se escribe nada. No hace commit.
+
+    Operaciones:
+        {'op': 'add', 'product_id': 1, 'quantity': 2}  suma unidades
+        {'op': 'update', 'item_id': 5, 'quantity': 3}  fija la cantidad
+        {'op': 'remove', 'item_id': 7}                 quita el item
+
+    Args:
+        user_id (int): ID del usuario
+        operations (list): Operaciones, se aplican en orden
+
+    Raises:
+        CartError: Operación inválida, item o producto inexistente o falta de stock
+    """
+    parsed = [parse_operation(position, operation) for position, operation in enumerate(operations)]
+
+    # Carrito, items y sus productos en una sola consulta
+    cart = load_active_cart(user_id)
+    items = {item.id: item for item in cart.items} if cart else {}
+    items_by_product = {item.product_id: item for item in items.values()}
+    products = {item.product_id: item.product for item in items.values()}
+    quantities = {item.product_id: item.quantity for item in items.values()}
+
+    # Productos nuevos: una sola consulta para todos
+    new_product_ids = {product_id for op, _, product_id, _ in parsed if op == 'add'} - set(products)
+    if new_product_ids:
+        products.update({
+            product.id: product
+            for product in Product.query.filter(Product.id.in_(new_product_ids)).all()
+        })
+
+    # Aplicar las operaciones sobre las cantidades en memoria
+    touched = set()
+    for position, (op, item_id, product_id, quantity) in enumerate(parsed):
+        if op == 'add':
+            if product_id not in products:
+                raise CartError(f'Operación {position}: producto no encontrado', 404)
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+            touched.add(product_id)
+            continue
+
+        item = items.get(item_id)
+        if item is None:
+            raise CartError(f'Operación {position}: item no encontrado en el carrito', 404)
+        quantities[item.product_id] = quantity if op == 'update' else 0
+        touched.add(item.product_id)
+
+    # Validar el stock de las cantidades finales, solo de los productos que
+    # cambió el batch: una línea que ya superaba el stock (porque el stock
+    # bajó) no bloquea cambios en otras
+    for product_id in touched:
+        quantity = quantities[product_id]
+        product = products[product_id]
+        if quantity > product.stock:
+            raise CartError(
+                f'Stock insuficiente para {product.name}. Solo hay {product.stock} unidades disponibles'
+            )
+
+    if cart is None:
+        cart = Cart(user_id=user_id, is_active=True)
+        db.session.add(cart)
+        db.session.flush()
+
+    new_items = []
+    for product_id, quantity in quantities.items():
+        item = items_by_product.get(product_id)
+        if item is None:
+            if quantity > 0:
+                new_items.append({'cart_id': cart.id, 'product_id': product_id, 'quantity': quantity})
+        elif quantity == 0:
+            db.session.delete(item)
+        elif item.quantity != quantity:
+            item.quantity = quantity
+    db.session.flush()
+
+    # Los items nuevos van en un solo INSERT (executemany)
+    if new_items:
+        db.session.execute(insert(CartItem.__table__), new_items)
+
+
+def prune_empty_carts(cutoff, batch_size=1000):
+    """
+    Borra un lote de carritos sin items creados antes de cutoff.
+    El DELETE vuelve a comprobar que el carrito siga vacío, así que un
+    producto agregado mientras corre el lote no se pierde. No hace commit.
+
+    Args:
+        cutoff (datetime): Solo se borran carritos creados antes de esta fecha
+        batch_size (int): Máximo de carritos por lote
+
+    Returns:
+        int: Cantidad de carritos borrados (0 cuando no quedan más)
+    """
+    empty = ~exists().where(CartItem.cart_id == Cart.id)
+    cart_ids = db.session.execute(
+        select(Cart.id).where(Cart.creation_date < cutoff, empty).order_by(Cart.id).limit(batch_size)
+    ).scalars().all()
+    if not cart_ids:
+        return 0
+
+    result = db.session.execute(
+        delete(Cart).where(Cart.id.in_(cart_ids), empty).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
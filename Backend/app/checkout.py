@@ -0,0 +1,140 @@
+# checkout.py
+# Servicio de checkout compartido por create_order y confirm_stripe_payment.
+#
+# place_order convierte el carrito activo del usuario en una orden dentro
+# de una sola transacción: carga el carrito con sus productos en una
+# consulta, bloquea las filas de producto (PostgreSQL), reserva el stock,
+# crea la orden, sus items y el pago y desactiva el carrito.
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .cache import cache
+from .cart import load_active_cart
+from .inventory import lock_products, reserve_stock, InsufficientStock
+from .models import Order, OrderItem, Payment
+
+
+class CheckoutError(Exception):
+    """El carrito no se puede convertir en orden (vacío, sin stock, etc.)"""
+
+
+def unit_price(product):
+    """Precio unitario que se cobra: el precio final con el descuento vigente"""
+    return round(product.final_price, 2)
+
+
+def product_snapshot(product):
+    """
+    Columnas de OrderItem que copian el producto al momento de la compra.
+    unit_final_price es el precio unitario cobrado: la suma de las líneas
+    (cantidad * unit_final_price) es el total_amount de la orden.
+    """
+    return {
+        'product_name': product.name,
+        'product_image_url': product.images[0] if product.images else product.image_url,
+        'brand_name': product.brand.name if product.brand else None,
+        'category_name': product.category.name if product.category else None,
+        'unit_final_price': unit_price(product)
+    }
+
+
+def create_order_items(order_id, cart_items):
+    """
+    Crea los items de una orden con un único INSERT ... RETURNING, en lugar
+    de un INSERT por item. Los objetos devueltos ya tienen ID y fecha, así
+    que se pueden serializar sin volver a consultarlos. Cada item guarda una
+    copia del nombre, imagen, marca, categoría y precio final del producto.
+    No hace commit.
+
+    Args:
+        order_id (int): ID de la orden (ya insertada)
+        cart_items (list): Items del carrito con su producto, categoría y
+            marca cargados
+
+    Returns:
+        list: Objetos OrderItem ordenados por ID
+    """
+    if not cart_items:
+        return []
+
+    # Sin sort_by_parameter_order: pedir el orden de los parámetros obliga a
+    # algunos motores a insertar fila por fila, así que se ordena por ID
+    order_items = db.session.scalars(
+        insert(OrderItem).returning(OrderItem),
+        [
+            {
+                'order_id': order_id,
+                'product_id': cart_item.product_id,
+                'quantity': cart_item.quantity,
+                'price': cart_item.product.price,
+                **product_snapshot(cart_item.product)
+            } for cart_item in cart_items
+        ]
+    ).all()
+    return sorted(order_items, key=lambda order_item: order_item.id)
+
+
+def place_order(user_id, address_id, status='pending', payment=None):
+    """
+    Crea una orden con el carrito activo del usuario y hace commit.
+    El total (y el monto del pago) usa el precio final de cada producto, con
+    descuento, el mismo que queda en OrderItem.unit_final_price.
+
+    Args:
+        user_id (int): ID del usuario
+        address_id (int): Dirección de envío (ya validada por el llamador)
+        status (str): Estado inicial de la orden
+        payment (dict): Campos del Payment a crear junto con la orden
+            (payment_method, status, transaction_id, payment_date), o None
+
+    Returns:
+        dict: Orden serializada con sus items
+
+    Raises:
+        CheckoutError: Si el carrito está vacío o falta stock
+    """
+    # Carrito, items y productos en una sola consulta
+    cart = load_active_cart(user_id)
+    items = sorted(cart.items, key=lambda item: item.product_id) if cart else []
+    if not items:
+        raise CheckoutError('No products in cart')
+
+    try:
+        # Bloquear los productos (en orden de ID) y releer precio y stock
+        lock_products([item.product_id for item in items])
+        reserve_stock([(item.product_id, item.quantity) for item in items], locked=True)
+
+        total_amount = round(sum(item.quantity * unit_price(item.product) for item in items), 2)
+
+        order = Order(
+            user_id=user_id,
+            total_amount=total_amount,
+            status=status,
+            address_id=address_id
+        )
+        db.session.add(order)
+        db.session.flush()  # Para obtener el ID de la orden
+
+        order_items = create_order_items(order.id, items)
+
+        if payment is not None:
+            db.session.add(Payment(order_id=order.id, amount=total_amount, **payment))
+
+        cart.is_active = False
+
+        # Serializar antes del commit: items y productos ya están cargados
+        order_data = order.serialize()
+        order_data['items'] = [item.serialize_snapshot() for item in order_items]
+
+        db.session.commit()
+
+    except InsufficientStock as e:
+        db.session.rollback()
+        raise CheckoutError(str(e))
+    except IntegrityError:
+        db.session.rollback()
+        raise CheckoutError('Error creating order')
+
+    cache.bump('stock')
+    return order_data
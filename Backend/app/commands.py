@@ -0,0 +1,40 @@
+# commands.py
+# Comandos de mantenimiento para la CLI de Flask (flask <comando>).
+
+import click
+from datetime import datetime, timedelta
+from . import db
+
+
+def register_commands(app):
+    @app.cli.command('rebuild-ratings')
+    def rebuild_ratings():
+        """Recalcula la tabla product_rating_summary desde las reviews."""
+        from .ratings import rebuild_rating_summaries
+        rows = rebuild_rating_summaries()
+        db.session.commit()
+        click.echo(f'✅ Resumen de ratings recalculado para {rows} productos')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Regenera el índice de búsqueda de texto completo de los productos (en SQLite crea la tabla FTS5 si falta)."""
+        from .search import create_search_index
+        create_search_index()
+        db.session.commit()
+        click.echo('✅ Índice de búsqueda regenerado')
+
+    @app.cli.command('prune-empty-carts')
+    @click.option('--days', default=30, show_default=True, help='Antigüedad mínima del carrito en días.')
+    @click.option('--batch-size', default=1000, show_default=True, help='Carritos borrados por transacción.')
+    def prune_empty_carts(days, batch_size):
+        """Borra por lotes los carritos sin items más antiguos que --days."""
+        from .cart import prune_empty_carts as prune_batch
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        total = 0
+        while True:
+            deleted = prune_batch(cutoff, batch_size)
+            db.session.commit()
+            total += deleted
+            if deleted < batch_size:
+                break
+        click.echo(f'✅ {total} carritos vacíos eliminados')
@@ -0,0 +1,110 @@
+# compression.py
+# Compresión de las respuestas según Accept-Encoding (brotli o gzip).
+#
+# Se aplica en un after_request a las respuestas de texto/JSON:
+# - Solo si el cliente la acepta; brotli se usa si el paquete está instalado.
+# - Las respuestas chicas (menos de COMPRESS_MIN_SIZE bytes), los 304/204 y
+#   las que ya tienen Content-Encoding se mandan tal cual.
+# - Las respuestas en streaming se comprimen por partes, sin juntarlas en memoria.
+#
+# Cada codificación es una representación distinta, así que un ETag fuerte
+# recibe un sufijo (-gzip / -br) y cache.etag acepta esos sufijos en
+# If-None-Match.
+
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Sufijo del ETag de cada codificación
+ETAG_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+
+def _encodings():
+    """Codificaciones disponibles, en orden de preferencia"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_LEVEL'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def _compress_stream(chunks, encoding, config):
+    """Comprime un iterable de bytes parte por parte"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=config['COMPRESS_BR_LEVEL'])
+        for chunk in chunks:
+            data = compressor.process(chunk.encode() if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib
+    compressor = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_response(response, config):
+    """
+    Comprime la respuesta si corresponde (ver el comentario del módulo).
+
+    Args:
+        response: Respuesta de Flask
+        config: Configuración de la app
+
+    Returns:
+        La misma respuesta, comprimida o no
+    """
+    if response.status_code == 304:
+        # Un 304 lleva el mismo Vary que la respuesta completa
+        response.vary.add('Accept-Encoding')
+        return response
+    if response.status_code == 204 or response.status_code < 200:
+        return response
+    if response.mimetype not in config['COMPRESS_MIMETYPES'] or 'Content-Encoding' in response.headers:
+        return response
+
+    # La respuesta depende de Accept-Encoding aunque esta vez no se comprima
+    response.vary.add('Accept-Encoding')
+
+    encoding = request.accept_encodings.best_match(_encodings())
+    if encoding is None or response.direct_passthrough:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(_compress(data, encoding, config))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag + ETAG_SUFFIXES[encoding])
+    return response
+
+
+def init_compression(app):
+    """Registra la compresión de respuestas si COMPRESS_ENABLED está activo"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    if brotli is None:
+        app.logger.info('brotli no está instalado; las respuestas se comprimen solo con gzip')
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config)
@@ -36,5 +36,40 @@ class Config:
     ENABLE_EMAILS = os.environ.get('ENABLE_EMAILS', '').lower() in ['true', '1', 'yes']
     MAIL_SUPPRESS_SEND = (not ENABLE_EMAILS) or not (MAIL_USERNAME and MAIL_PASSWORD)
 
+    # Configuración de texto de PostgreSQL para la búsqueda de productos ('simple' no aplica stemming)
+    SEARCH_TS_CONFIG = os.environ.get('SEARCH_TS_CONFIG', 'simple')
+
+    # Caché de respuestas del catálogo: 'memory' (por defecto) o 'redis'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 512))
+    # Procesos que sirven la app (gunicorn toma WEB_CONCURRENCY como cantidad de
+    # workers); con más de uno la caché en memoria no sirve: sin 'redis' la caché
+    # de respuestas y los ETags se desactivan
+    CACHE_WORKERS = int(os.environ.get('CACHE_WORKERS', os.environ.get('WEB_CONCURRENCY', 1)))
+    # Cambiarlo en cada deploy invalida los ETags que tengan guardados los clientes
+    ETAG_SALT = os.environ.get('ETAG_SALT', os.environ.get('RENDER_GIT_COMMIT', ''))
+
+    # Cada cuántos segundos se recarga completo el índice de autocompletado en memoria
+    AUTOCOMPLETE_REFRESH_SECONDS = int(os.environ.get('AUTOCOMPLETE_REFRESH_SECONDS', 300))
+
+    # Cabecera X-SQL-Query-Count en cada respuesta (para detectar consultas N+1)
+    SQL_QUERY_COUNT_HEADER = os.environ.get('SQL_QUERY_COUNT_HEADER', '').lower() in ['true', '1', 'yes']
+
+    # Motor JSON de las respuestas: 'auto' (orjson si está instalado) o 'stdlib'
+    JSON_ENGINE = os.environ.get('JSON_ENGINE', 'auto')
+
+    # Compresión de respuestas (gzip, o brotli si el paquete está instalado)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ['true', '1', 'yes']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # Bytes; más chicas van sin comprimir
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip: 1-9
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))  # brotli: 0-11
+    COMPRESS_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'text/javascript'}
+
+    # Carrito de invitado: token firmado con SECRET_KEY que guarda el cliente
+    GUEST_CART_MAX_AGE_DAYS = int(os.environ.get('GUEST_CART_MAX_AGE_DAYS', 30))
+    GUEST_CART_MAX_LINES = int(os.environ.get('GUEST_CART_MAX_LINES', 50))
+
     STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY')
     STRIPE_PUBLIC_KEY = os.environ.get('STRIPE_PUBLIC_KEY')
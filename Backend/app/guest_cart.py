@@ -0,0 +1,287 @@
+# guest_cart.py
+# Carrito de invitado (sin login).
+#
+# El carrito vive del lado del cliente en un token firmado con SECRET_KEY
+# (itsdangerous): una lista compacta de pares [product_id, cantidad]. Mirar
+# o modificar el carrito de invitado solo lee productos, no escribe nada en
+# la base de datos. Al iniciar sesión, merge_guest_cart pasa todas las
+# líneas al carrito persistido con un único INSERT ... ON CONFLICT DO UPDATE.
+# El merge es idempotente (cada línea queda con la mayor de las dos
+# cantidades), así que reenviar el mismo token no suma unidades de nuevo.
+
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from sqlalchemy import select, case, literal, Integer
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .cart import CartError, parse_operation, upsert_insert, active_cart_id
+from .loading import product_options
+from .models import Cart, CartItem, Product
+
+TOKEN_SALT = 'guest-cart'
+
+
+class GuestCartItem:
+    """Línea del carrito de invitado (misma interfaz que usa cart_totals)"""
+
+    def __init__(self, product, quantity):
+        self.product = product
+        self.product_id = product.id
+        self.quantity = quantity
+
+    def serialize(self):
+        return {
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'product': self.product.serialize()
+        }
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=TOKEN_SALT)
+
+
+def encode_guest_cart(quantities):
+    """
+    Firma el carrito de invitado.
+
+    Args:
+        quantities (dict): {product_id: cantidad}
+
+    Returns:
+        str: Token para guardar en el cliente
+    """
+    return _serializer().dumps([[product_id, quantity] for product_id, quantity in quantities.items()])
+
+
+def decode_guest_cart(token):
+    """
+    Verifica la firma y la antigüedad del token y devuelve sus líneas.
+    Un token vacío o None es un carrito vacío.
+
+    Returns:
+        dict: {product_id: cantidad}, en el orden en que se agregaron
+
+    Raises:
+        CartError: Si el token está alterado, vencido o mal formado
+    """
+    if not token:
+        return {}
+
+    max_age = current_app.config['GUEST_CART_MAX_AGE_DAYS'] * 86400
+    try:
+        lines = _serializer().loads(token, max_age=max_age)
+    except SignatureExpired:
+        raise CartError('El carrito de invitado expiró')
+    except BadSignature:
+        raise CartError('Carrito de invitado inválido')
+
+    quantities = {}
+    try:
+        for product_id, quantity in lines:
+            if int(quantity) > 0:
+                quantities[int(product_id)] = int(quantity)
+    except (TypeError, ValueError):
+        raise CartError('Carrito de invitado inválido')
+
+    if len(quantities) > current_app.config['GUEST_CART_MAX_LINES']:
+        raise CartError('Carrito de invitado inválido')
+    return quantities
+
+
+def _load_products(product_ids):
+    """Productos con categoría y marca en una sola consulta: {id: Product}"""
+    if not product_ids:
+        return {}
+    return {
+        product.id: product
+        for product in Product.query.options(*product_options()).filter(Product.id.in_(product_ids)).all()
+    }
+
+
+def guest_cart_items(quantities):
+    """
+    Líneas del carrito de invitado con sus productos (una consulta).
+    Los productos que ya no existen se descartan.
+
+    Returns:
+        list: Objetos GuestCartItem en el orden del carrito
+    """
+    products = _load_products(list(quantities))
+    return [
+        GuestCartItem(products[product_id], quantity)
+        for product_id, quantity in quantities.items()
+        if product_id in products
+    ]
+
+
+def apply_guest_operations(quantities, operations):
+    """
+    Aplica operaciones al carrito de invitado validando el stock con una
+    sola consulta de productos. No escribe en la base de datos.
+
+    Operaciones (como en POST /api/cart/batch, pero siempre por producto):
+        {'op': 'add', 'product_id': 1, 'quantity': 2}     suma unidades
+        {'op': 'update', 'product_id': 1, 'quantity': 3}  fija la cantidad
+        {'op': 'remove', 'product_id': 1}                 quita el producto
+
+    Args:
+        quantities (dict): Carrito actual, {product_id: cantidad}
+        operations (list): Operaciones, se aplican en orden
+
+    Returns:
+        list: Objetos GuestCartItem del carrito resultante
+
+    Raises:
+        CartError: Operación inválida, producto inexistente, falta de stock
+            o demasiadas líneas
+    """
+    parsed = [
+        parse_operation(position, operation, by_product=True)
+        for position, operation in enumerate(operations)
+    ]
+
+    products = _load_products(
+        set(quantities) | {product_id for _, _, product_id, _ in parsed}
+    )
+    quantities = {
+        product_id: quantity for product_id, quantity in quantities.items() if product_id in products
+    }
+
+    touched = set()
+    for position, (op, _, product_id, quantity) in enumerate(parsed):
+        if op == 'add':
+            if product_id not in products:
+                raise CartError(f'Operación {position}: producto no encontrado', 404)
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+            touched.add(product_id)
+            continue
+
+        if product_id not in quantities:
+            raise CartError(f'Operación {position}: producto no encontrado en el carrito', 404)
+        if op == 'update':
+            quantities[product_id] = quantity
+            touched.add(product_id)
+        else:
+            del quantities[product_id]
+            touched.discard(product_id)
+
+    # Como en apply_batch, solo se valida el stock de los productos que cambiaron
+    for product_id in touched:
+        product = products[product_id]
+        quantity = quantities[product_id]
+        if quantity > product.stock:
+            raise CartError(
+                f'Stock insuficiente para {product.name}. Solo hay {product.stock} unidades disponibles'
+            )
+
+    max_lines = current_app.config['GUEST_CART_MAX_LINES']
+    if len(quantities) > max_lines:
+        raise CartError(f'El carrito de invitado admite hasta {max_lines} productos')
+
+    return [GuestCartItem(products[product_id], quantity) for product_id, quantity in quantities.items()]
+
+
+def merge_guest_cart(user_id, quantities):
+    """
+    Pasa las líneas del carrito de invitado al carrito activo del usuario
+    (lo crea si no tiene uno). La cantidad del invitado se recorta al stock
+    disponible y cada línea queda con la mayor entre esa y la que ya había:
+    aplicar el mismo token dos veces (login + /api/cart/merge, un reintento)
+    no suma unidades de nuevo. Los productos inexistentes o sin stock se
+    ignoran. No hace commit.
+
+    En PostgreSQL y SQLite todas las líneas van en una sola sentencia:
+        INSERT INTO cart_item (cart_id, product_id, quantity)
+        SELECT :cart_id, product.id, min(<cantidad>, product.stock) FROM product
+        WHERE product.id IN (...) AND product.stock > 0
+        ON CONFLICT (cart_id, product_id) DO UPDATE
+        SET quantity = max(cart_item.quantity, excluded.quantity)
+
+    Args:
+        user_id (int): ID del usuario
+        quantities (dict): {product_id: cantidad} (de decode_guest_cart)
+
+    Returns:
+        int: Cantidad de líneas agregadas o actualizadas
+    """
+    if not quantities:
+        return 0
+
+    cart_id = db.session.execute(select(active_cart_id(user_id))).scalar()
+    if cart_id is None:
+        cart = Cart(user_id=user_id, is_active=True)
+        db.session.add(cart)
+        db.session.flush()
+        cart_id = cart.id
+
+    dialect_insert = upsert_insert()
+    if dialect_insert is None:
+        return _merge_guest_cart_orm(cart_id, quantities)
+
+    cart_item = CartItem.__table__
+    product = Product.__table__
+    requested = case(quantities, value=product.c.id)
+
+    source = select(
+        literal(cart_id, Integer),
+        product.c.id,
+        case((requested > product.c.stock, product.c.stock), else_=requested)
+    ).where(
+        product.c.id.in_(list(quantities)),
+        product.c.stock > 0
+    )
+
+    statement = dialect_insert(cart_item).from_select(['cart_id', 'product_id', 'quantity'], source)
+    # excluded.quantity ya viene recortada al stock
+    guest_quantity = statement.excluded.quantity
+    statement = statement.on_conflict_do_update(
+        index_elements=['cart_id', 'product_id'],
+        set_={'quantity': case((guest_quantity > cart_item.c.quantity, guest_quantity), else_=cart_item.c.quantity)}
+    ).returning(cart_item.c.product_id)
+
+    return len(db.session.execute(statement).all())
+
+
+def _merge_guest_cart_orm(cart_id, quantities):
+    """Versión con el ORM para motores sin ON CONFLICT"""
+    products = {
+        product.id: product
+        for product in Product.query.filter(Product.id.in_(list(quantities)), Product.stock > 0).all()
+    }
+    items = {
+        item.product_id: item
+        for item in CartItem.query.filter(CartItem.cart_id == cart_id, CartItem.product_id.in_(list(products))).all()
+    }
+
+    for product_id, product in products.items():
+        item = items.get(product_id)
+        quantity = min(quantities[product_id], product.stock)
+        if item:
+            item.quantity = max(item.quantity, quantity)
+        else:
+            db.session.add(CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity))
+    db.session.flush()
+    return len(products)
+
+
+def merge_guest_cart_on_login(user_id, token):
+    """
+    Merge del carrito de invitado que manda el cliente al iniciar sesión.
+    Hace commit; si el token no es válido o falla la escritura, deshace el
+    merge y el login sigue siendo válido.
+
+    Args:
+        user_id (int): ID del usuario que inició sesión
+        token (str): Token del carrito de invitado
+
+    Returns:
+        bool: True si el carrito se combinó
+    """
+    try:
+        merge_guest_cart(user_id, decode_guest_cart(token))
+        db.session.commit()
+        return True
+    except (CartError, IntegrityError):
+        db.session.rollback()
+        return False
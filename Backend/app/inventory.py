@@ -0,0 +1,131 @@
+# inventory.py
+# Reserva y liberación de stock para el checkout.
+#
+# El stock se descuenta con un único UPDATE condicional en la base de datos
+# (stock = stock - cantidad WHERE stock >= cantidad), en lugar de leerlo,
+# compararlo en Python y escribirlo: dos compras simultáneas del último
+# artículo ya no pueden pasar las dos el chequeo.
+#
+# En PostgreSQL las filas se bloquean antes con SELECT ... FOR UPDATE
+# ordenado por ID, así dos checkouts con los mismos productos siempre los
+# bloquean en el mismo orden y no se producen deadlocks.
+
+from collections import OrderedDict
+from sqlalchemy import select, update, case
+from . import db
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    """No hay stock suficiente para alguna de las líneas de la reserva"""
+
+    def __init__(self, product_id, name, available):
+        self.product_id = product_id
+        self.name = name
+        self.available = available
+        super().__init__(f'Insufficient stock for {name}. Only {available} units available')
+
+
+def _quantities(lines):
+    """Agrupa las líneas por producto, ordenadas por ID: {product_id: cantidad}"""
+    quantities = {}
+    for product_id, quantity in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return OrderedDict(sorted(quantities.items()))
+
+
+def lock_products(product_ids):
+    """
+    Bloquea las filas de los productos hasta el fin de la transacción
+    (SELECT ... ORDER BY id FOR UPDATE) y refresca los objetos Product ya
+    cargados en la sesión con los valores bloqueados. Solo en PostgreSQL;
+    en otros motores no hace nada.
+
+    Args:
+        product_ids (list): IDs de los productos
+    """
+    if not product_ids or db.session.get_bind().dialect.name != 'postgresql':
+        return
+    Product.query.filter(
+        Product.id.in_(sorted(set(product_ids)))
+    ).order_by(Product.id).with_for_update().populate_existing().all()
+
+
+def reserve_stock(lines, locked=False):
+    """
+    Descuenta el stock de varios productos de forma atómica.
+    No hace commit: debe llamarse dentro de la transacción del checkout.
+    Si lanza InsufficientStock, el llamador tiene que hacer rollback.
+
+    Args:
+        lines (list): Pares (product_id, cantidad)
+        locked (bool): True si las filas ya se bloquearon con lock_products
+
+    Raises:
+        InsufficientStock: Si algún producto no tiene stock suficiente
+    """
+    quantities = _quantities(lines)
+    if not quantities:
+        return
+
+    table = Product.__table__
+    product_ids = list(quantities)
+    bind = db.session.get_bind()
+
+    if not locked and bind.dialect.name == 'postgresql':
+        # Bloquear las filas en orden de ID antes de modificarlas
+        db.session.execute(
+            select(table.c.id).where(table.c.id.in_(product_ids)).order_by(table.c.id).with_for_update()
+        )
+
+    quantity = case(quantities, value=table.c.id)
+    statement = (
+        update(table)
+        .where(table.c.id.in_(product_ids), table.c.stock >= quantity)
+        .values(stock=table.c.stock - quantity)
+    )
+
+    if bind.dialect.update_returning:
+        reserved = {row.id for row in db.session.execute(statement.returning(table.c.id))}
+    else:
+        result = db.session.execute(statement)
+        reserved = set(product_ids) if result.rowcount == len(product_ids) else set()
+
+    if len(reserved) == len(product_ids):
+        return
+
+    # Informar el primer producto sin stock suficiente (las filas no actualizadas
+    # conservan su stock original)
+    missing = [product_id for product_id in product_ids if product_id not in reserved]
+    rows = {
+        row.id: row for row in db.session.execute(
+            select(table.c.id, table.c.name, table.c.stock).where(table.c.id.in_(missing))
+        )
+    }
+    for product_id in missing:
+        row = rows.get(product_id)
+        if row is None:
+            raise InsufficientStock(product_id, f'product {product_id}', 0)
+        if row.stock < quantities[product_id]:
+            raise InsufficientStock(product_id, row.name, row.stock)
+    raise InsufficientStock(missing[0], rows[missing[0]].name, rows[missing[0]].stock)
+
+
+def release_stock(lines):
+    """
+    Devuelve al stock las cantidades de una reserva (por ejemplo al cancelar
+    una orden). No hace commit.
+
+    Args:
+        lines (list): Pares (product_id, cantidad)
+    """
+    quantities = _quantities(lines)
+    if not quantities:
+        return
+
+    table = Product.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.id.in_(list(quantities)))
+        .values(stock=table.c.stock + case(quantities, value=table.c.id))
+    )
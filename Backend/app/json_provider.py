@@ -0,0 +1,70 @@
+# json_provider.py
+# Codificación JSON de las respuestas de la API.
+#
+# FastJSONProvider usa orjson cuando está instalado (codifica en C y arma la
+# respuesta directamente en bytes) y si no, el encoder de la librería
+# estándar de Flask. La salida es la misma en ambos casos: claves ordenadas,
+# fechas con http_date (como Flask) y claves no string convertidas a texto.
+#
+# JSON_ENGINE elige el motor: 'auto' (orjson si está disponible) o 'stdlib'.
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Argumentos de json.dumps que orjson puede reproducir
+ORJSON_DUMP_ARGS = {'indent', 'separators', 'sort_keys', 'ensure_ascii', 'default'}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask con orjson y respaldo en la librería estándar"""
+
+    use_orjson = orjson is not None
+
+    def _orjson_dumps(self, obj, indent=False, sort_keys=None, default=None):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default or self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        if not self.use_orjson or not set(kwargs) <= ORJSON_DUMP_ARGS or kwargs.get('indent') not in (None, 2):
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._orjson_dumps(
+                obj, kwargs.get('indent'), kwargs.get('sort_keys'), kwargs.get('default')
+            ).decode()
+        except TypeError:
+            # Enteros de más de 64 bits u otros valores que orjson no acepta
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._orjson_dumps(obj, indent) + b'\n'
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Registra FastJSONProvider según JSON_ENGINE ('auto' o 'stdlib')"""
+    app.json = FastJSONProvider(app)
+    if app.config.get('JSON_ENGINE', 'auto') == 'stdlib':
+        app.json.use_orjson = False
+    elif orjson is None:
+        app.logger.info('orjson no está instalado; se usa el encoder JSON de la librería estándar')
@@ -0,0 +1,59 @@
+# loading.py
+# Perfiles de carga (eager loading) para las consultas de los endpoints.
+# Cada perfil precarga las relaciones que usa el serialize() correspondiente,
+# evitando una consulta perezosa (lazy load) por cada fila.
+
+from sqlalchemy.orm import joinedload, selectinload
+from .models import Product, Category, Cart, CartItem, Order
+
+
+def product_options():
+    """Product.serialize() usa category y brand"""
+    return (
+        joinedload(Product.category),
+        joinedload(Product.brand),
+    )
+
+
+def category_options():
+    """Category.serialize() usa subcategories"""
+    return (
+        selectinload(Category.subcategories),
+    )
+
+
+def cart_item_options():
+    """CartItem.serialize() incluye el producto completo"""
+    product = joinedload(CartItem.product)
+    return (
+        product.joinedload(Product.category),
+        product.joinedload(Product.brand),
+    )
+
+
+def cart_options():
+    """Carrito con sus items, cada uno con producto, categoría y marca (una sola consulta)"""
+    product = joinedload(Cart.items).joinedload(CartItem.product)
+    return (
+        product.joinedload(Product.category),
+        product.joinedload(Product.brand),
+    )
+
+
+def order_options():
+    """Order.serialize() incluye la dirección"""
+    return (
+        joinedload(Order.address),
+    )
+
+
+def order_detail_options():
+    """
+    Orden con dirección e items: los items de toda la página de órdenes se
+    cargan en un lote (SELECT ... IN). OrderItem.serialize_snapshot() no
+    usa el producto, así que no se carga.
+    """
+    return (
+        *order_options(),
+        selectinload(Order.items),
+    )
@@ -7,7 +7,7 @@ from datetime import datetime
 from sqlalchemy import func
 from sqlalchemy.orm import validates
 from sqlalchemy import CheckConstraint
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
 
 # Definimos el modelo User, que representa la tabla 'user' en la base de datos
 class User(db.Model):
@@ -94,6 +94,15 @@ class Product(db.Model):
         CheckConstraint('price >= 0', name='check_price_positive'),
         CheckConstraint('stock >= 0', name='check_stock_positive'),
         CheckConstraint('discount_percentage >= 0 AND discount_percentage <= 100', name='check_discount_percentage'),
+        db.Index('ix_product_search_vector', 'search_vector', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        # El listado siempre filtra is_active: índices parciales solo con los productos activos
+        db.Index('ix_product_active_category_id', 'category_id',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_product_active_price', 'price', 'id',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_product_active_discount_percentage', 'discount_percentage', 'id',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active = 1')),
+        db.Index('ix_product_brand_id', 'brand_id'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -110,6 +119,9 @@ class Product(db.Model):
     brand = db.relationship('Brand', backref=db.backref('products', lazy=True))
     discount_percentage = db.Column(db.Float, default=0.0)  # Porcentaje de descuento (0-100)
     is_active = db.Column(db.Boolean, default=True)  # Si el producto está activo para venta
+    # Vector de búsqueda de texto completo (mantenido por app/search.py). Diferido
+    # para no leerlo en cada consulta de productos. En SQLite se usa FTS5 en su lugar.
+    search_vector = db.deferred(db.Column(TSVECTOR().with_variant(db.Text(), 'sqlite'), nullable=True))
 
     @validates('price', 'stock')
     def validate_positive(self, key, value):
@@ -123,12 +135,17 @@ class Product(db.Model):
             raise ValueError("El descuento debe estar entre 0 y 100")
         return value
 
+    @staticmethod
+    def price_after_discount(price, discount_percentage):
+        """Precio con el porcentaje de descuento aplicado"""
+        if discount_percentage > 0:
+            return price * (1 - discount_percentage / 100)
+        return price
+
     @property
     def final_price(self):
         """Precio final después del descuento"""
-        if self.discount_percentage > 0:
-            return self.price * (1 - self.discount_percentage / 100)
-        return self.price
+        return Product.price_after_discount(self.price, self.discount_percentage)
 
     @property
     def has_discount(self):
@@ -162,6 +179,8 @@ class Review(db.Model):
     __tablename__ = 'review'
     __table_args__ = (
         CheckConstraint('rating >= 1 AND rating <= 5', name='check_rating_range'),
+        db.Index('ix_review_product_id_rating', 'product_id', 'rating'),
+        db.Index('ix_review_user_id_creation_date', 'user_id', 'creation_date'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -199,6 +218,31 @@ class Review(db.Model):
             'is_helpful': self.is_helpful
         }
 
+class ProductRatingSummary(db.Model):
+    __tablename__ = 'product_rating_summary'
+
+    # Resumen desnormalizado de las reviews de cada producto.
+    # Se mantiene al crear, editar o borrar reviews (ver app/ratings.py).
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True)
+    product = db.relationship('Product', backref=db.backref('rating_summary', uselist=False, lazy=True, cascade='all, delete-orphan'))
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    avg_rating = db.Column(db.Float, nullable=True, index=True)  # NULL si no hay reviews
+
+    def __repr__(self):
+        return f'<ProductRatingSummary {self.product_id} - {self.avg_rating}>'
+
+    def serialize(self):
+        return {
+            'average': float(self.avg_rating or 0),
+            'count': int(self.review_count or 0)
+        }
+
 class Discount(db.Model):
     __tablename__ = 'discount'
     __table_args__ = (
@@ -262,6 +306,9 @@ class Discount(db.Model):
 
 class Cart(db.Model):
     __tablename__ = 'cart'
+    __table_args__ = (
+        db.Index('ix_cart_user_id_is_active', 'user_id', 'is_active'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -282,6 +329,10 @@ class Cart(db.Model):
 
 class CartItem(db.Model):
     __tablename__ = 'cart_item'
+    __table_args__ = (
+        # Un producto aparece una sola vez por carrito (lo usa el upsert de add_to_cart)
+        db.UniqueConstraint('cart_id', 'product_id', name='uq_cart_item_cart_id_product_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey('cart.id'), nullable=False)
@@ -312,6 +363,9 @@ class CartItem(db.Model):
 
 class Address(db.Model):
     __tablename__ = 'address'
+    __table_args__ = (
+        db.Index('ix_address_user_id_is_default', 'user_id', 'is_default'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     user = db.relationship('User', backref=db.backref('addresses', lazy=True))
@@ -344,7 +398,11 @@ class Order(db.Model):
     __tablename__ = 'order'
     __table_args__ = (
         CheckConstraint('total_amount >= 0', name='check_total_amount_positive'),
+        db.Index('ix_order_user_id_creation_date', 'user_id', 'creation_date'),
+        db.Index('ix_order_creation_date', 'creation_date'),
     )
+    # Trae creation_date al insertar, para serializar la orden sin otra consulta
+    __mapper_args__ = {'eager_defaults': True}
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -373,6 +431,7 @@ class OrderItem(db.Model):
     __tablename__ = 'order_item'
     __table_args__ = (
         CheckConstraint('price >= 0', name='check_price_positive'),
+        db.Index('ix_order_item_order_id', 'order_id'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -383,6 +442,14 @@ class OrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False, default=1)
     price = db.Column(db.Float, nullable=False)
     creation_date = db.Column(db.DateTime, server_default=func.now())
+    # Copia del producto al momento de la compra: el historial de órdenes
+    # muestra lo que se compró sin leer el catálogo actual
+    product_name = db.Column(db.String(120), nullable=True)
+    product_image_url = db.Column(db.String(255), nullable=True)
+    brand_name = db.Column(db.String(120), nullable=True)
+    category_name = db.Column(db.String(120), nullable=True)
+    # Precio unitario cobrado (price es el de lista); las líneas suman total_amount
+    unit_final_price = db.Column(db.Float, nullable=True)
 
     @validates('quantity')
     def validate_quantity(self, key, value):
@@ -410,10 +477,32 @@ class OrderItem(db.Model):
             'product': self.product.serialize() if self.product else None
         }
 
+    def serialize_snapshot(self):
+        """Versión para las vistas de órdenes: usa la copia del producto, no lo carga"""
+        return {
+            'id': self.id,
+            'order_id': self.order_id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'price': self.price,
+            'unit_final_price': self.unit_final_price,
+            'creation_date': self.creation_date.isoformat(),
+            'product': {
+                'id': self.product_id,
+                'name': self.product_name,
+                'image_url': self.product_image_url,
+                'images': [self.product_image_url] if self.product_image_url else [],
+                'brand': self.brand_name,
+                'category': self.category_name
+            }
+        }
+
 class Payment(db.Model):
     __tablename__ = 'payment'
     __table_args__ = (
         CheckConstraint('amount >= 0', name='check_amount_positive'),
+        db.Index('ix_payment_status_creation_date', 'status', 'creation_date'),
+        db.Index('ix_payment_creation_date', 'creation_date'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,151 @@
+# ratings.py
+# Funciones auxiliares para las estadísticas de rating de los productos.
+# Las lecturas usan la tabla desnormalizada product_rating_summary, que se
+# actualiza en la misma transacción que las escrituras de reviews.
+
+from sqlalchemy import func, case, update, delete, insert, select
+from . import db
+from .models import Review, ProductRatingSummary
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def empty_rating():
+    """Rating por defecto para productos sin reviews"""
+    return {'average': 0.0, 'count': 0}
+
+
+def get_ratings_for_products(product_ids):
+    """
+    Obtiene el rating promedio y la cantidad de reviews de varios productos
+    con una única consulta sobre la tabla de resumen.
+
+    Args:
+        product_ids (list): IDs de los productos
+
+    Returns:
+        dict: {product_id: {'average': float, 'count': int}}
+    """
+    if not product_ids:
+        return {}
+
+    summaries = ProductRatingSummary.query.filter(
+        ProductRatingSummary.product_id.in_(product_ids)
+    ).all()
+
+    return {summary.product_id: summary.serialize() for summary in summaries}
+
+
+def get_rating(product_id):
+    """Obtiene el rating promedio y la cantidad de reviews de un producto"""
+    summary = db.session.get(ProductRatingSummary, product_id)
+    return summary.serialize() if summary else empty_rating()
+
+
+def empty_distribution():
+    """Distribución de ratings vacía"""
+    return {f'{star}_star': 0 for star in reversed(STARS)}
+
+
+def get_review_stats(product_id):
+    """
+    Estadísticas de reviews de un producto (promedio, total y distribución
+    por estrellas) leídas de una sola fila del resumen, sin importar
+    cuántas reviews tenga el producto.
+    """
+    summary = db.session.get(ProductRatingSummary, product_id)
+    if not summary:
+        return {
+            'average_rating': 0.0,
+            'total_reviews': 0,
+            'rating_distribution': empty_distribution()
+        }
+
+    return {
+        'average_rating': float(summary.avg_rating or 0),
+        'total_reviews': int(summary.review_count or 0),
+        'rating_distribution': {
+            f'{star}_star': getattr(summary, f'rating_{star}') for star in reversed(STARS)
+        }
+    }
+
+
+def apply_review_change(product_id, old_rating=None, new_rating=None):
+    """
+    Actualiza el resumen de un producto tras crear, editar o borrar una review.
+    No hace commit: debe llamarse dentro de la transacción de la escritura.
+
+    Args:
+        product_id (int): ID del producto
+        old_rating (int): Rating anterior (None si la review es nueva)
+        new_rating (int): Rating nuevo (None si la review se borró)
+    """
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    if count_delta == 0 and sum_delta == 0:
+        return
+
+    summary = ProductRatingSummary.__table__.c
+    new_count = summary.review_count + count_delta
+    new_sum = summary.rating_sum + sum_delta
+
+    values = {
+        'review_count': new_count,
+        'rating_sum': new_sum,
+        'avg_rating': case((new_count > 0, new_sum * 1.0 / new_count), else_=None)
+    }
+    for star in STARS:
+        star_delta = (new_rating == star) - (old_rating == star)
+        if star_delta:
+            column = summary[f'rating_{star}']
+            values[f'rating_{star}'] = column + star_delta
+
+    # En SQL, el lado derecho del SET usa los valores previos de la fila
+    result = db.session.execute(
+        update(ProductRatingSummary.__table__)
+        .where(summary.product_id == product_id)
+        .values(**values)
+    )
+
+    if result.rowcount == 0:
+        # Producto sin resumen todavía: lo calculamos desde la tabla de reviews
+        db.session.flush()
+        rebuild_rating_summaries([product_id])
+
+
+def rebuild_rating_summaries(product_ids=None):
+    """
+    Recalcula el resumen de rating desde la tabla de reviews.
+    No hace commit.
+
+    Args:
+        product_ids (list): Productos a recalcular (None = todos)
+
+    Returns:
+        int: Cantidad de filas de resumen generadas
+    """
+    table = ProductRatingSummary.__table__
+
+    delete_stmt = delete(table)
+    if product_ids is not None:
+        delete_stmt = delete_stmt.where(table.c.product_id.in_(product_ids))
+    db.session.execute(delete_stmt)
+
+    aggregate = select(
+        Review.product_id,
+        func.count(Review.id),
+        func.sum(Review.rating),
+        *[func.sum(case((Review.rating == star, 1), else_=0)) for star in STARS],
+        func.avg(Review.rating * 1.0)
+    ).group_by(Review.product_id)
+    if product_ids is not None:
+        aggregate = aggregate.where(Review.product_id.in_(product_ids))
+
+    result = db.session.execute(
+        insert(table).from_select(
+            ['product_id', 'review_count', 'rating_sum',
+             *[f'rating_{star}' for star in STARS], 'avg_rating'],
+            aggregate
+        )
+    )
+    return result.rowcount
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from app.models import Cart, CartItem, Product
 from app import db # type: ignore
+from app.loading import cart_item_options
+from app.cart import load_active_cart, empty_cart, sorted_items, cart_totals, add_item, apply_batch, CartError, MAX_BATCH_OPERATIONS
+from app.guest_cart import decode_guest_cart, encode_guest_cart, guest_cart_items, apply_guest_operations, merge_guest_cart
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
 
@@ -14,28 +17,16 @@ def get_cart():
     """Obtener el carrito activo del usuario"""
     current_user_id = get_jwt_identity()
     
-    # Buscar carrito activo del usuario
-    cart = Cart.query.filter_by(user_id=current_user_id, is_active=True).first()
-    
-    if not cart:
-        # Si no existe un carrito activo, crear uno nuevo
-        cart = Cart()
-        cart.user_id = current_user_id
-        cart.is_active = True
-        db.session.add(cart)
-        db.session.commit()
+    # Carrito activo con items, productos, categorías y marcas en una sola consulta
+    cart = load_active_cart(current_user_id)
     
-    # Obtener todos los items del carrito con información del producto
-    cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-    
-    # Calcular total del carrito
-    total = sum(item.quantity * item.product.price for item in cart_items if item.product)
+    # Sin carrito activo se devuelve uno virtual vacío: la fila se crea con el primer producto
+    items = sorted_items(cart)
     
     return jsonify({
-        'cart': cart.serialize(),
-        'items': [item.serialize() for item in cart_items],
-        'total': total,
-        'item_count': len(cart_items)
+        'cart': cart.serialize() if cart else empty_cart(current_user_id),
+        'items': [item.serialize() for item in items],
+        **cart_totals(items)
     }), 200
 
 @cart_bp.route('/add', methods=['POST'])
@@ -54,48 +45,142 @@ def add_to_cart():
     if quantity <= 0:
         return jsonify({'message': 'La cantidad debe ser mayor a 0'}), 400
     
-    # Verificar que el producto existe y tiene stock
-    product = Product.query.get(product_id)
-    if not product:
-        return jsonify({'message': 'Producto no encontrado'}), 404
+    try:
+        # Camino rápido: un solo upsert (valida producto, stock y carrito en la misma sentencia)
+        if add_item(current_user_id, product_id, quantity) is None:
+            # No se escribió nada: averiguar por qué
+            product = db.session.get(Product, product_id)
+            if not product:
+                return jsonify({'message': 'Producto no encontrado'}), 404
+            
+            if not Cart.query.filter_by(user_id=current_user_id, is_active=True).first():
+                # Crear el carrito activo y reintentar en la misma transacción
+                cart = Cart()
+                cart.user_id = current_user_id
+                cart.is_active = True
+                db.session.add(cart)
+                db.session.flush()
+                
+                if add_item(current_user_id, product_id, quantity) is not None:
+                    db.session.commit()
+                    return jsonify({'message': 'Producto agregado al carrito exitosamente'}), 200
+            
+            available = product.stock
+            db.session.rollback()
+            return jsonify({'message': f'Stock insuficiente. Solo hay {available} unidades disponibles'}), 400
+        
+        db.session.commit()
+        
+        return jsonify({'message': 'Producto agregado al carrito exitosamente'}), 200
+        
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Error al agregar producto al carrito'}), 400
+
+@cart_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch_update_cart():
+    """Aplicar varias operaciones (add/update/remove) al carrito en una sola transacción"""
+    current_user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'message': 'operations es requerido (lista de operaciones)'}), 400
     
-    if product.stock < quantity:
-        return jsonify({'message': f'Stock insuficiente. Solo hay {product.stock} unidades disponibles'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'message': f'Máximo {MAX_BATCH_OPERATIONS} operaciones por pedido'}), 400
     
-    # Obtener o crear carrito activo
-    cart = Cart.query.filter_by(user_id=current_user_id, is_active=True).first()
-    if not cart:
-        cart = Cart()
-        cart.user_id = current_user_id
-        cart.is_active = True
-        db.session.add(cart)
+    try:
+        apply_batch(current_user_id, operations)
         db.session.commit()
+        
+    except CartError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), e.status_code
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Error al actualizar el carrito'}), 400
+    
+    # Devolver el nuevo estado del carrito (una sola consulta)
+    cart = load_active_cart(current_user_id)
+    items = sorted_items(cart)
+    
+    return jsonify({
+        'cart': cart.serialize(),
+        'items': [item.serialize() for item in items],
+        **cart_totals(items)
+    }), 200
+
+# ==================== CARRITO DE INVITADO ====================
+# El carrito de invitado viaja en un token firmado que guarda el cliente:
+# estas rutas no requieren login y no escriben en la base de datos.
+
+def guest_cart_response(items):
+    """Token nuevo + items + totales del carrito de invitado"""
+    return jsonify({
+        'token': encode_guest_cart({item.product_id: item.quantity for item in items}),
+        'items': [item.serialize() for item in items],
+        **cart_totals(items)
+    })
+
+@cart_bp.route('/guest', methods=['GET'])
+def get_guest_cart():
+    """Obtener el carrito de invitado (?token=...)"""
+    try:
+        quantities = decode_guest_cart(request.args.get('token'))
+    except CartError as e:
+        return jsonify({'message': str(e)}), e.status_code
     
-    # Verificar si el producto ya está en el carrito
-    existing_item = CartItem.query.filter_by(cart_id=cart.id, product_id=product_id).first()
+    return guest_cart_response(guest_cart_items(quantities)), 200
+
+@cart_bp.route('/guest', methods=['POST'])
+def update_guest_cart():
+    """Aplicar operaciones (add/update/remove por product_id) al carrito de invitado"""
+    data = request.get_json() or {}
+    
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'message': 'operations es requerido (lista de operaciones)'}), 400
+    
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'message': f'Máximo {MAX_BATCH_OPERATIONS} operaciones por pedido'}), 400
     
     try:
-        if existing_item:
-            # Actualizar cantidad si ya existe
-            new_quantity = existing_item.quantity + quantity
-            if product.stock < new_quantity:
-                return jsonify({'message': f'Stock insuficiente. Solo hay {product.stock} unidades disponibles'}), 400
-            existing_item.quantity = new_quantity
-        else:
-            # Crear nuevo item
-            new_item = CartItem()
-            new_item.cart_id = cart.id
-            new_item.product_id = product_id
-            new_item.quantity = quantity
-            db.session.add(new_item)
-        
+        items = apply_guest_operations(decode_guest_cart(data.get('token')), operations)
+    except CartError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    
+    return guest_cart_response(items), 200
+
+@cart_bp.route('/merge', methods=['POST'])
+@jwt_required()
+def merge_cart():
+    """Pasar el carrito de invitado al carrito del usuario"""
+    current_user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    
+    if not data.get('token'):
+        return jsonify({'message': 'token es requerido'}), 400
+    
+    try:
+        merge_guest_cart(current_user_id, decode_guest_cart(data['token']))
         db.session.commit()
         
-        return jsonify({'message': 'Producto agregado al carrito exitosamente'}), 200
-        
+    except CartError as e:
+        return jsonify({'message': str(e)}), e.status_code
     except IntegrityError:
         db.session.rollback()
-        return jsonify({'message': 'Error al agregar producto al carrito'}), 400
+        return jsonify({'message': 'Error al combinar el carrito'}), 400
+    
+    cart = load_active_cart(current_user_id)
+    items = sorted_items(cart)
+    
+    return jsonify({
+        'cart': cart.serialize() if cart else empty_cart(current_user_id),
+        'items': [item.serialize() for item in items],
+        **cart_totals(items)
+    }), 200
 
 @cart_bp.route('/update/<int:item_id>', methods=['PUT'])
 @jwt_required()
@@ -168,7 +253,8 @@ def clear_cart():
     
     cart = Cart.query.filter_by(user_id=current_user_id, is_active=True).first()
     if not cart:
-        return jsonify({'message': 'Carrito no encontrado'}), 404
+        # El carrito se crea con el primer producto: sin carrito ya está vacío
+        return jsonify({'message': 'Carrito vaciado exitosamente'}), 200
     
     try:
         # Eliminar todos los items del carrito
@@ -187,11 +273,12 @@ def get_cart_item(item_id):
     """Obtener información de un item específico del carrito"""
     current_user_id = get_jwt_identity()
     
-    cart = Cart.query.filter_by(user_id=current_user_id, is_active=True).first()
-    if not cart:
-        return jsonify({'message': 'Carrito no encontrado'}), 404
-    
-    cart_item = CartItem.query.filter_by(id=item_id, cart_id=cart.id).first()
+    # Item del carrito activo del usuario, con su producto, en una sola consulta
+    cart_item = CartItem.query.join(CartItem.cart).options(*cart_item_options()).filter(
+        CartItem.id == item_id,
+        Cart.user_id == current_user_id,
+        Cart.is_active == True
+    ).first()
     if not cart_item:
         return jsonify({'message': 'Item no encontrado en el carrito'}), 404
     
@@ -203,19 +290,10 @@ def get_cart_summary():
     """Obtener resumen del carrito (total, cantidad de items)"""
     current_user_id = get_jwt_identity()
     
-    cart = Cart.query.filter_by(user_id=current_user_id, is_active=True).first()
-    if not cart:
-        return jsonify({
-            'total': 0,
-            'item_count': 0,
-            'items': []
-        }), 200
-    
-    cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-    total = sum(item.quantity * item.product.price for item in cart_items if item.product)
+    # Sin carrito activo el resumen queda en cero
+    items = sorted_items(load_active_cart(current_user_id))
     
     return jsonify({
-        'total': total,
-        'item_count': len(cart_items),
-        'items': [item.serialize() for item in cart_items]
+        'items': [item.serialize() for item in items],
+        **cart_totals(items)
     }), 200 
\ No newline at end of file
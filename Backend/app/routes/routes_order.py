@@ -1,12 +1,23 @@
 from flask import Blueprint, request, jsonify
-from app.models import Order, OrderItem, Cart, CartItem, Address, Product
+from app.models import Order, OrderItem, Address
 from app import db # type: ignore
+from app.loading import order_detail_options
+from app.cache import cache
+from app.utils import keyset_paginate
+from app.serializers import order_rows, serialize_order_row, order_items_by_order
+from app.checkout import place_order, CheckoutError
+from app.inventory import release_stock
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime
 
 order_bp = Blueprint('order_bp', __name__)
 
+def serialize_order_with_items(order):
+    """Order with its items (order.items must be loaded with order_detail_options)"""
+    order_data = order.serialize()
+    order_data['items'] = [item.serialize_snapshot() for item in sorted(order.items, key=lambda item: item.id)]
+    return order_data
+
 # ==================== RUTAS DE ÓRDENES ====================
 
 @order_bp.route('/', methods=['GET'])
@@ -17,21 +28,14 @@ def get_orders():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
-    orders = Order.query.filter_by(user_id=current_user_id).order_by(Order.creation_date.desc()).paginate(
+    # Orders + address as column tuples, then the items of the whole page in one query
+    orders = order_rows(Order.query.filter_by(user_id=current_user_id)).order_by(Order.creation_date.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
-    
-    # Serialize orders with their items
-    orders_data = []
-    for order in orders.items:
-        order_data = order.serialize()
-        # Get order items
-        order_items = OrderItem.query.filter_by(order_id=order.id).all()
-        order_data['items'] = [item.serialize() for item in order_items]
-        orders_data.append(order_data)
+    items = order_items_by_order([row[0] for row in orders.items])
     
     return jsonify({
-        'orders': orders_data,
+        'orders': [{**serialize_order_row(row), 'items': items[row[0]]} for row in orders.items],
         'total': orders.total,
         'pages': orders.pages,
         'current_page': page
@@ -43,17 +47,11 @@ def get_order(order_id):
     """Get a specific user order"""
     current_user_id = get_jwt_identity()
     
-    order = Order.query.filter_by(id=order_id, user_id=current_user_id).first()
+    order = Order.query.options(*order_detail_options()).filter_by(id=order_id, user_id=current_user_id).first()
     if not order:
         return jsonify({'message': 'Order not found'}), 404
     
-    # Get order items
-    order_items = OrderItem.query.filter_by(order_id=order_id).all()
-    
-    order_data = order.serialize()
-    order_data['items'] = [item.serialize() for item in order_items]
-    
-    return jsonify(order_data), 200
+    return jsonify(serialize_order_with_items(order)), 200
 
 @order_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -70,62 +68,16 @@ def create_order():
     if not address:
         return jsonify({'message': 'Address not found'}), 404
     
-    # Get user's active cart
-    cart = Cart.query.filter_by(user_id=current_user_id, is_active=True).first()
-    if not cart:
-        return jsonify({'message': 'No products in cart'}), 400
-    
-    cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-    if not cart_items:
-        return jsonify({'message': 'No products in cart'}), 400
-    
-    # Check stock for all products
-    for item in cart_items:
-        if item.product.stock < item.quantity:
-            return jsonify({
-                'message': f'Insufficient stock for {item.product.name}. Only {item.product.stock} units available'
-            }), 400
-    
+    # Cart -> order in a single transaction (stock reservation, items, cart deactivation)
     try:
-        # Calculate order total
-        total_amount = sum(item.quantity * item.product.price for item in cart_items)
-        
-        # Create the order
-        new_order = Order()
-        new_order.user_id = current_user_id
-        new_order.total_amount = total_amount
-        new_order.status = 'pending'
-        new_order.address_id = data['address_id']
-        
-        db.session.add(new_order)
-        db.session.flush()  # To get the order ID
-        
-        # Create order items
-        for cart_item in cart_items:
-            order_item = OrderItem()
-            order_item.order_id = new_order.id
-            order_item.product_id = cart_item.product_id
-            order_item.quantity = cart_item.quantity
-            order_item.price = cart_item.product.price
-            
-            db.session.add(order_item)
-            
-            # Update product stock
-            cart_item.product.stock -= cart_item.quantity
-        
-        # Deactivate current cart
-        cart.is_active = False
-        
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Order created successfully',
-            'order': new_order.serialize()
-        }), 201
-        
-    except IntegrityError:
-        db.session.rollback()
-        return jsonify({'message': 'Error creating order'}), 400
+        order_data = place_order(current_user_id, address.id)
+    except CheckoutError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    return jsonify({
+        'message': 'Order created successfully',
+        'order': order_data
+    }), 201
 
 @order_bp.route('/<int:order_id>/status', methods=['PUT'])
 @jwt_required()
@@ -180,11 +132,11 @@ def cancel_order(order_id):
         order.status = 'cancelled'
         
         # Restore product stock
-        order_items = OrderItem.query.filter_by(order_id=order_id).all()
-        for item in order_items:
-            item.product.stock += item.quantity
+        order_items = db.session.query(OrderItem.product_id, OrderItem.quantity).filter_by(order_id=order_id).all()
+        release_stock(order_items)
         
         db.session.commit()
+        cache.bump('stock')
         
         return jsonify({'message': 'Order cancelled successfully'}), 200
         
@@ -212,12 +164,24 @@ def get_all_orders():
     if status:
         query = query.filter(Order.status == status)
     
-    orders = query.order_by(Order.creation_date.desc()).paginate(
+    # Modo cursor (opcional): paginación por keyset, sin OFFSET ni COUNT
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', '').lower() == 'true'
+        sort_keys = [(Order.creation_date, True), (Order.id, True)]
+        try:
+            page_data = keyset_paginate(order_rows(query), sort_keys, cursor, per_page, include_total)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        page_data['orders'] = [serialize_order_row(row) for row in page_data.pop('items')]
+        return jsonify(page_data), 200
+    
+    orders = order_rows(query).order_by(Order.creation_date.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
     return jsonify({
-        'orders': [order.serialize() for order in orders.items],
+        'orders': [serialize_order_row(row) for row in orders.items],
         'total': orders.total,
         'pages': orders.pages,
         'current_page': page
@@ -234,14 +198,8 @@ def get_order_admin(order_id):
     if not user or not user.is_admin:
         return jsonify({'message': 'Access denied. Admin privileges required'}), 403
     
-    order = Order.query.get(order_id)
+    order = Order.query.options(*order_detail_options()).get(order_id)
     if not order:
         return jsonify({'message': 'Order not found'}), 404
     
-    # Get order items
-    order_items = OrderItem.query.filter_by(order_id=order_id).all()
-    
-    order_data = order.serialize()
-    order_data['items'] = [item.serialize() for item in order_items]
-    
-    return jsonify(order_data), 200 
\ No newline at end of file
+    return jsonify(serialize_order_with_items(order)), 200 
\ No newline at end of file
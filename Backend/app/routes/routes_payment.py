@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
-from app.models import Payment, Order, OrderItem, Cart, CartItem, Address
+from app.models import Payment, Order, Address
 from app import db # type: ignore
+from app.utils import keyset_paginate
+from app.checkout import place_order, CheckoutError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
@@ -224,6 +226,18 @@ def get_all_payments():
     if status:
         query = query.filter(Payment.status == status)
     
+    # Modo cursor (opcional): paginación por keyset, sin OFFSET ni COUNT
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', '').lower() == 'true'
+        sort_keys = [(Payment.creation_date, True), (Payment.id, True)]
+        try:
+            page_data = keyset_paginate(query, sort_keys, cursor, per_page, include_total)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        page_data['payments'] = [payment.serialize() for payment in page_data.pop('items')]
+        return jsonify(page_data), 200
+    
     payments = query.order_by(Payment.creation_date.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -343,72 +357,23 @@ def confirm_stripe_payment():
         if session.payment_status != 'paid':
             return jsonify({'message': 'Payment not completed'}), 400
         
-        # Obtener el carrito del usuario
-        cart = Cart.query.filter_by(user_id=current_user_id, is_active=True).first()
-        if not cart:
-            return jsonify({'message': 'No active cart found'}), 400
-        
-        cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-        if not cart_items:
-            return jsonify({'message': 'No items in cart'}), 400
-        
-        # Verificar stock
-        for item in cart_items:
-            if item.product.stock < item.quantity:
-                return jsonify({
-                    'message': f'Insufficient stock for {item.product.name}. Only {item.product.stock} units available'
-                }), 400
-        
         # Obtener la dirección por defecto del usuario
         address = Address.query.filter_by(user_id=current_user_id, is_default=True).first()
         if not address:
             return jsonify({'message': 'No default shipping address found'}), 400
         
-        # Crear la orden
-        total_amount = sum(item.quantity * item.product.price for item in cart_items)
-        
-        new_order = Order()
-        new_order.user_id = current_user_id
-        new_order.total_amount = total_amount
-        new_order.status = 'processing'  # Cambiar a 'processing' ya que el pago está confirmado
-        new_order.address_id = address.id
-        
-        db.session.add(new_order)
-        db.session.flush()  # Para obtener el ID de la orden
-        
-        # Crear los items de la orden
-        for cart_item in cart_items:
-            order_item = OrderItem()
-            order_item.order_id = new_order.id
-            order_item.product_id = cart_item.product_id
-            order_item.quantity = cart_item.quantity
-            order_item.price = cart_item.product.price
-            
-            db.session.add(order_item)
-            
-            # Actualizar stock del producto
-            cart_item.product.stock -= cart_item.quantity
-        
-        # Crear el registro de pago
-        payment = Payment()
-        payment.order_id = new_order.id
-        payment.amount = total_amount
-        payment.payment_method = 'stripe'
-        payment.status = 'completed'
-        payment.transaction_id = session.payment_intent
-        payment.payment_date = datetime.utcnow()
-        
-        db.session.add(payment)
-        
-        # Desactivar el carrito actual
-        cart.is_active = False
-        
-        db.session.commit()
-        
-        # Obtener la orden con todos los detalles para la respuesta
-        order_data = new_order.serialize()
-        order_items = OrderItem.query.filter_by(order_id=new_order.id).all()
-        order_data['items'] = [item.serialize() for item in order_items]
+        # Crear la orden, sus items y el pago en una sola transacción
+        order_data = place_order(
+            current_user_id,
+            address.id,
+            status='processing',  # 'processing' ya que el pago está confirmado
+            payment={
+                'payment_method': 'stripe',
+                'status': 'completed',
+                'transaction_id': session.payment_intent,
+                'payment_date': datetime.utcnow()
+            }
+        )
         
         return jsonify({
             'message': 'Payment confirmed and order created successfully',
@@ -417,9 +382,8 @@ def confirm_stripe_payment():
         
     except stripe.error.StripeError as e:
         return jsonify({'message': f'Stripe error: {str(e)}'}), 400
-    except IntegrityError:
-        db.session.rollback()
-        return jsonify({'message': 'Error creating order'}), 400
+    except CheckoutError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': f'Unexpected error: {str(e)}'}), 500 
\ No newline at end of file
@@ -1,15 +1,42 @@
 from flask import Blueprint, request, jsonify
-from app.models import Product, Category, Brand, Review, Discount, ReviewLike
+from app.models import Product, Category, Brand, Review, Discount, ReviewLike, ProductRatingSummary
 from app import db # type: ignore
+from app.loading import category_options
+from app.autocomplete import get_autocomplete_index
+from app.cache import cache
+from app.search import apply_search, reindex_products, remove_products
+from app.utils import keyset_paginate, order_by_keys
+from app.serializers import product_serializer, product_category_serializer, review_serializer, parse_fields, PRODUCT_FIELDS, REVIEW_FIELDS
+from app.stats import get_catalog_stats
+from app.ratings import get_ratings_for_products, get_rating, get_review_stats, apply_review_change, empty_rating
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
 
 product_bp = Blueprint('product_bp', __name__)
 
+# 'rating' no es una columna: sale del resumen de ratings (app/ratings.py)
+PRODUCT_RESPONSE_FIELDS = [*PRODUCT_FIELDS, 'rating']
+
+def parse_product_fields():
+    """
+    Lee ?fields= de los endpoints de productos.
+
+    Returns:
+        tuple: (campos de columnas o None para todos, si se pidió el rating)
+
+    Raises:
+        ValueError: Si se pide un campo que no existe
+    """
+    fields = parse_fields(request.args.get('fields'), PRODUCT_RESPONSE_FIELDS)
+    if fields is None:
+        return None, True
+    return [name for name in fields if name != 'rating'], 'rating' in fields
+
 # ==================== RUTAS DE PRODUCTOS ====================
 
 @product_bp.route('/', methods=['GET'])
+@cache.etag('catalog', 'reviews', 'stock')
 def get_products():
     """Obtener todos los productos con filtros opcionales"""
     # Parámetros de paginación
@@ -37,9 +64,17 @@ def get_products():
     has_image = request.args.get('has_image', type=bool)  # Productos con imagen
     has_discount = request.args.get('has_discount', type=bool)  # Productos con descuento
     min_rating = request.args.get('min_rating', type=float)  # Rating mínimo
-    sort_by = request.args.get('sort_by', 'rating')  # rating, name, price, creation_date, stock, discount
+    # Con búsqueda de texto, por defecto se ordena por relevancia
+    sort_by = request.args.get('sort_by', 'relevance' if search else 'rating')  # relevance, rating, name, price, creation_date, stock, discount
     sort_order = request.args.get('sort_order', 'desc')  # asc, desc
     
+    # Campos de la respuesta (opcional): ?fields=id,name,final_price,image_url
+    try:
+        fields, include_rating = parse_product_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = product_serializer(fields)
+    
     query = Product.query.filter(Product.is_active == True)
     
     # Aplicar filtros básicos
@@ -52,17 +87,10 @@ def get_products():
         else:
             query = query.filter(Product.brand_id.in_(brand_ids))
     
+    search_rank = None
     if search:
-        # Búsqueda en nombre, descripción, marca y categoría
-        search_filter = f'%{search}%'
-        query = query.filter(
-            db.or_(
-                Product.name.ilike(search_filter),
-                Product.description.ilike(search_filter),
-                Brand.name.ilike(search_filter),
-                Category.name.ilike(search_filter)
-            )
-        ).join(Brand, Product.brand_id == Brand.id, isouter=True).join(Category, Product.category_id == Category.id, isouter=True)
+        # Búsqueda de texto completo en nombre, marca, categoría y descripción
+        query, search_rank = apply_search(query, search)
     
     if min_price is not None:
         query = query.filter(Product.price >= min_price)
@@ -92,75 +120,75 @@ def get_products():
     if has_discount:
         query = query.filter(Product.discount_percentage > 0)
     
+    rating_joined = False
     if min_rating is not None:
-        # Subconsulta para obtener productos con rating mínimo
-        subquery = db.session.query(Review.product_id, func.avg(Review.rating).label('avg_rating')).group_by(Review.product_id).having(func.avg(Review.rating) >= min_rating).subquery()
-        query = query.join(subquery, Product.id == subquery.c.product_id)
-    
-    # Aplicar ordenamiento
-    if sort_by == 'price':
-        if sort_order == 'desc':
-            query = query.order_by(Product.price.desc())
-        else:
-            query = query.order_by(Product.price.asc())
+        # El rating promedio está precalculado en product_rating_summary
+        query = query.join(ProductRatingSummary, Product.id == ProductRatingSummary.product_id)
+        query = query.filter(ProductRatingSummary.avg_rating >= min_rating)
+        rating_joined = True
+    
+    # Aplicar ordenamiento: (expresión, descendente, admite NULL); el ID
+    # desempata y hace que el orden sea estable entre páginas
+    descending = sort_order == 'desc'
+    nullable = False
+    if sort_by == 'relevance' and search_rank is not None:
+        sort_column, descending = search_rank, True
+    elif sort_by == 'price':
+        sort_column = Product.price
     elif sort_by == 'creation_date':
-        if sort_order == 'desc':
-            query = query.order_by(Product.creation_date.desc())
-        else:
-            query = query.order_by(Product.creation_date.asc())
+        sort_column = Product.creation_date
     elif sort_by == 'stock':
-        if sort_order == 'desc':
-            query = query.order_by(Product.stock.desc())
-        else:
-            query = query.order_by(Product.stock.asc())
+        sort_column = Product.stock
     elif sort_by == 'rating':
-        # Ordenar por rating promedio
-        subquery = db.session.query(Review.product_id, func.avg(Review.rating).label('avg_rating')).group_by(Review.product_id).subquery()
-        query = query.outerjoin(subquery, Product.id == subquery.c.product_id)
-        if sort_order == 'desc':
-            query = query.order_by(subquery.c.avg_rating.desc().nullslast())
-        else:
-            query = query.order_by(subquery.c.avg_rating.asc().nullslast())
+        # Ordenar por rating promedio (columna indexada del resumen)
+        if not rating_joined:
+            query = query.outerjoin(ProductRatingSummary, Product.id == ProductRatingSummary.product_id)
+        # Columna sin envolver (puede usar el índice); los productos sin
+        # reviews (NULL) quedan al final en ambos sentidos
+        sort_column = ProductRatingSummary.avg_rating
+        nullable = True
     elif sort_by == 'discount':
-        if sort_order == 'desc':
-            query = query.order_by(Product.discount_percentage.desc())
-        else:
-            query = query.order_by(Product.discount_percentage.asc())
+        sort_column = Product.discount_percentage
     else:  # name por defecto
-        if sort_order == 'desc':
-            query = query.order_by(Product.name.desc())
-        else:
-            query = query.order_by(Product.name.asc())
+        sort_column = Product.name
+    sort_keys = [(sort_column, descending, nullable), (Product.id, descending)]
+    
+    # Se leen solo las columnas de la respuesta, sin objetos ORM (app/serializers.py)
+    query = serializer.select(query)
+    
+    # Modo cursor (opcional): paginación por keyset, sin OFFSET ni COUNT
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', '').lower() == 'true'
+        try:
+            page_data = keyset_paginate(query, sort_keys, cursor, per_page, include_total)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        items = page_data.pop('items')
+        pagination_data = page_data
+    else:
+        products = order_by_keys(query, sort_keys).paginate(page=page, per_page=per_page, error_out=False)
+        items = products.items
+        pagination_data = {
+            'total': products.total,
+            'pages': products.pages,
+            'current_page': page,
+            'per_page': per_page,
+            'has_next': products.has_next,
+            'has_prev': products.has_prev
+        }
     
-    # Aplicar paginación
-    products = query.paginate(page=page, per_page=per_page, error_out=False)
+    product_list = [serializer(row) for row in items]
     
-    # Obtener ratings para cada producto
-    product_list = []
-    for product in products.items:
-        product_data = product.serialize()
-        
-        # Calcular rating promedio y cantidad de reviews
-        reviews_stats = db.session.query(
-            func.avg(Review.rating).label('avg_rating'),
-            func.count(Review.id).label('review_count')
-        ).filter(Review.product_id == product.id).first()
-        
-        product_data['rating'] = {
-            'average': float(reviews_stats.avg_rating or 0),
-            'count': int(reviews_stats.review_count or 0)
-        }
-        
-        product_list.append(product_data)
+    if include_rating:
+        # Obtener ratings de toda la página con una sola consulta agrupada
+        ratings = get_ratings_for_products([product_data['id'] for product_data in product_list])
+        for product_data in product_list:
+            product_data['rating'] = ratings.get(product_data['id'], empty_rating())
     
     return jsonify({
         'products': product_list,
-        'total': products.total,
-        'pages': products.pages,
-        'current_page': page,
-        'per_page': per_page,
-        'has_next': products.has_next,
-        'has_prev': products.has_prev,
+        **pagination_data,
         'filters_applied': {
             'category_id': category_id,
             'brand_id': brand_ids,
@@ -175,29 +203,30 @@ def get_products():
             'has_discount': has_discount,
             'min_rating': min_rating,
             'sort_by': sort_by,
-            'sort_order': sort_order
+            'sort_order': sort_order,
+            'fields': fields
         }
     }), 200
 
 @product_bp.route('/<int:product_id>', methods=['GET'])
+@cache.etag('catalog', 'reviews', 'stock')
 def get_product(product_id):
     """Obtener un producto específico por ID"""
-    product = Product.query.get(product_id)
-    if not product:
-        return jsonify({'message': 'Producto no encontrado'}), 404
+    try:
+        fields, include_rating = parse_product_fields()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    serializer = product_serializer(fields)
     
-    # Calcular estadísticas de rating
-    rating_stats = db.session.query(
-        func.avg(Review.rating).label('average'),
-        func.count(Review.id).label('count')
-    ).filter_by(product_id=product_id).first()
+    # Solo las columnas de los campos pedidos
+    row = serializer.select(Product.query.filter(Product.id == product_id)).first()
+    if not row:
+        return jsonify({'message': 'Producto no encontrado'}), 404
     
     # Serializar el producto y agregar las estadísticas de rating
-    product_data = product.serialize()
-    product_data['rating'] = {
-        'average': float(rating_stats.average or 0),
-        'count': int(rating_stats.count or 0)
-    }
+    product_data = serializer(row)
+    if include_rating:
+        product_data['rating'] = get_rating(product_id)
     
     return jsonify(product_data), 200
 
@@ -245,7 +274,11 @@ def create_product():
         new_product.is_active = data.get('is_active', True)
         
         db.session.add(new_product)
+        db.session.flush()
+        reindex_products([new_product.id])
         db.session.commit()
+        cache.bump('catalog')
+        get_autocomplete_index().update_product(new_product)
         
         return jsonify({
             'message': 'Producto creado exitosamente',
@@ -306,7 +339,11 @@ def update_product(product_id):
         if 'is_active' in data:
             product.is_active = data['is_active']
         
+        db.session.flush()
+        reindex_products([product.id])
         db.session.commit()
+        cache.bump('catalog')
+        get_autocomplete_index().update_product(product)
         
         return jsonify({
             'message': 'Producto actualizado exitosamente',
@@ -332,8 +369,11 @@ def delete_product(product_id):
         return jsonify({'message': 'Producto no encontrado'}), 404
     
     try:
+        remove_products([product.id])
         db.session.delete(product)
         db.session.commit()
+        cache.bump('catalog')
+        get_autocomplete_index().remove_product(product_id)
         return jsonify({'message': 'Producto eliminado exitosamente'}), 200
     except IntegrityError:
         db.session.rollback()
@@ -344,6 +384,12 @@ def search_autocomplete():
     """Búsqueda de autocompletado para productos, categorías y marcas"""
     query = request.args.get('q', '').strip()
     
+    # Campos de los productos (opcional): ?fields=id,name,image_url
+    try:
+        fields = parse_fields(request.args.get('fields'), PRODUCT_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     if len(query) < 2:
         return jsonify({
             'products': [],
@@ -351,113 +397,53 @@ def search_autocomplete():
             'brands': []
         }), 200
     
-    # Buscar productos (máximo 4)
-    products = Product.query.filter(
-        Product.is_active == True,
-        db.or_(
-            Product.name.ilike(f'%{query}%'),
-            Product.description.ilike(f'%{query}%')
-        )
-    ).limit(4).all()
-    
-    # Buscar categorías que coincidan
-    categories = Category.query.filter(
-        Category.name.ilike(f'%{query}%')
-    ).limit(2).all()
-    
-    # Buscar marcas que coincidan
-    brands = Brand.query.filter(
-        Brand.name.ilike(f'%{query}%')
-    ).limit(2).all()
-    
-    return jsonify({
-        'products': [product.serialize() for product in products],
-        'categories': [category.serialize() for category in categories],
-        'brands': [brand.serialize() for brand in brands]
-    }), 200
+    # Productos (máximo 4), categorías y marcas (máximo 2) desde el índice en memoria
+    results = get_autocomplete_index().search(query, product_limit=4, category_limit=2, brand_limit=2)
+    
+    # El índice solo guarda id, nombre y marca: precio, stock y demás campos
+    # se leen de la base para los productos encontrados (una consulta por ID)
+    product_ids = [product['id'] for product in results['products']]
+    products = {}
+    if product_ids:
+        serializer = product_serializer(fields)
+        for row in serializer.select(
+            Product.query.filter(Product.id.in_(product_ids), Product.is_active == True)
+        ).all():
+            product_data = serializer(row)
+            products[product_data['id']] = product_data
+    results['products'] = [products[product_id] for product_id in product_ids if product_id in products]
+    
+    return jsonify(results), 200
 
 @product_bp.route('/stats', methods=['GET'])
+@cache.etag('catalog', 'reviews', 'stock')
+@cache.cached('catalog', 'reviews', 'stock')
 def get_product_stats():
     """Obtener estadísticas de productos para filtros dinámicos"""
-    # Rango de precios
-    price_stats = db.session.query(
-        func.min(Product.price).label('min_price'),
-        func.max(Product.price).label('max_price'),
-        func.avg(Product.price).label('avg_price')
-    ).filter(Product.is_active == True).first()
-    
-    # Productos por categoría
-    category_stats = db.session.query(
-        Category.name,
-        func.count(Product.id).label('product_count')
-    ).join(Product).filter(Product.is_active == True).group_by(Category.id, Category.name).all()
-    
-    # Productos por marca
-    brand_stats = db.session.query(
-        Brand.name,
-        func.count(Product.id).label('product_count')
-    ).join(Product).filter(Product.is_active == True).group_by(Brand.id, Brand.name).all()
-    
-    # Productos en stock vs sin stock
-    stock_stats = db.session.query(
-        func.sum(func.case([(Product.stock > 0, 1)], else_=0)).label('in_stock'),
-        func.sum(func.case([(Product.stock == 0, 1)], else_=0)).label('out_of_stock')
-    ).filter(Product.is_active == True).first()
-    
-    # Productos con descuento
-    discount_stats = db.session.query(
-        func.sum(func.case([(Product.discount_percentage > 0, 1)], else_=0)).label('with_discount'),
-        func.sum(func.case([(Product.discount_percentage == 0, 1)], else_=0)).label('without_discount')
-    ).filter(Product.is_active == True).first()
-    
-    # Promedio de ratings por producto
-    avg_rating = db.session.query(
-        func.avg(Review.rating).label('avg_rating'),
-        func.count(Review.id).label('total_reviews')
-    ).first()
-    
-    # Total de productos activos
-    total_products = Product.query.filter(Product.is_active == True).count()
+    # Totales, categorías, marcas y rating en una o dos consultas agregadas
+    return jsonify(get_catalog_stats()), 200
+
+@product_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    """Estadísticas de la caché de respuestas (solo admin)"""
+    current_user_id = get_jwt_identity()
+    from app.models import User
+    user = User.query.get(current_user_id)
     
-    return jsonify({
-        'total_products': total_products,
-        'price_range': {
-            'min': float(price_stats.min_price or 0),
-            'max': float(price_stats.max_price or 0),
-            'average': float(price_stats.avg_price or 0)
-        },
-        'categories': [
-            {
-                'name': stat.name,
-                'product_count': stat.product_count
-            } for stat in category_stats
-        ],
-        'brands': [
-            {
-                'name': stat.name,
-                'product_count': stat.product_count
-            } for stat in brand_stats
-        ],
-        'stock_status': {
-            'in_stock': int(stock_stats.in_stock or 0),
-            'out_of_stock': int(stock_stats.out_of_stock or 0)
-        },
-        'discount_status': {
-            'with_discount': int(discount_stats.with_discount or 0),
-            'without_discount': int(discount_stats.without_discount or 0)
-        },
-        'rating_stats': {
-            'average_rating': float(avg_rating.avg_rating or 0),
-            'total_reviews': int(avg_rating.total_reviews or 0)
-        }
-    }), 200
+    if not user or not user.is_admin:
+        return jsonify({'message': 'Acceso denegado. Se requieren permisos de administrador'}), 403
+    
+    return jsonify(cache.stats()), 200
 
 # ==================== RUTAS DE CATEGORÍAS ====================
 
 @product_bp.route('/categories', methods=['GET'])
+@cache.etag('catalog')
+@cache.cached('catalog')
 def get_categories():
     """Obtener todas las categorías"""
-    categories = Category.query.all()
+    categories = Category.query.options(*category_options()).all()
     return jsonify([category.serialize() for category in categories]), 200
 
 @product_bp.route('/categories/<int:category_id>', methods=['GET'])
@@ -493,6 +479,8 @@ def create_category():
         
         db.session.add(new_category)
         db.session.commit()
+        cache.bump('catalog')
+        get_autocomplete_index().update_category(new_category)
         
         return jsonify({
             'message': 'Categoría creada exitosamente',
@@ -528,7 +516,19 @@ def update_category(category_id):
         if 'category_id' in data:
             category.category_id = data['category_id']
         
+        if 'name' in data:
+            # El nombre de la categoría forma parte del índice de búsqueda
+            db.session.flush()
+            reindex_products(category_id=category.id)
+        
         db.session.commit()
+        cache.bump('catalog')
+        
+        if 'name' in data:
+            # Los productos de la categoría muestran su nombre: recarga completa
+            get_autocomplete_index().invalidate()
+        else:
+            get_autocomplete_index().update_category(category)
         
         return jsonify({
             'message': 'Categoría actualizada exitosamente',
@@ -562,6 +562,8 @@ def delete_category(category_id):
     try:
         db.session.delete(category)
         db.session.commit()
+        cache.bump('catalog')
+        get_autocomplete_index().remove_category(category_id)
         return jsonify({'message': 'Categoría eliminada exitosamente'}), 200
     except IntegrityError:
         db.session.rollback()
@@ -570,6 +572,8 @@ def delete_category(category_id):
 # ==================== RUTAS DE MARCAS ====================
 
 @product_bp.route('/brands', methods=['GET'])
+@cache.etag('catalog')
+@cache.cached('catalog')
 def get_brands():
     """Obtener todas las marcas"""
     brands = Brand.query.all()
@@ -609,6 +613,8 @@ def create_brand():
         
         db.session.add(new_brand)
         db.session.commit()
+        cache.bump('catalog')
+        get_autocomplete_index().update_brand(new_brand)
         
         return jsonify({
             'message': 'Marca creada exitosamente',
@@ -646,7 +652,19 @@ def update_brand(brand_id):
         if 'website' in data:
             brand.website = data['website']
         
+        if 'name' in data:
+            # El nombre de la marca forma parte del índice de búsqueda
+            db.session.flush()
+            reindex_products(brand_id=brand.id)
+        
         db.session.commit()
+        cache.bump('catalog')
+        
+        if 'name' in data:
+            # Los productos de la marca muestran su nombre: recarga completa
+            get_autocomplete_index().invalidate()
+        else:
+            get_autocomplete_index().update_brand(brand)
         
         return jsonify({
             'message': 'Marca actualizada exitosamente',
@@ -680,6 +698,8 @@ def delete_brand(brand_id):
     try:
         db.session.delete(brand)
         db.session.commit()
+        cache.bump('catalog')
+        get_autocomplete_index().remove_brand(brand_id)
         return jsonify({'message': 'Marca eliminada exitosamente'}), 200
     except IntegrityError:
         db.session.rollback()
@@ -695,12 +715,18 @@ def get_product_reviews(product_id):
     sort_by = request.args.get('sort_by', 'rating')  # rating, creation_date, helpful
     sort_order = request.args.get('sort_order', 'desc')  # asc, desc
     
+    # Campos de cada review (opcional): ?fields=id,rating,title
+    try:
+        serializer = review_serializer(parse_fields(request.args.get('fields'), REVIEW_FIELDS))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Verificar que el producto existe
     product = Product.query.get(product_id)
     if not product:
         return jsonify({'message': 'Producto no encontrado'}), 404
     
-    query = Review.query.filter_by(product_id=product_id)
+    query = serializer.select(Review.query.filter_by(product_id=product_id))
     
     # Aplicar ordenamiento
     if sort_by == 'rating':
@@ -721,32 +747,15 @@ def get_product_reviews(product_id):
     
     reviews = query.paginate(page=page, per_page=per_page, error_out=False)
     
-    # Calcular estadísticas de reviews
-    stats = db.session.query(
-    func.avg(Review.rating).label('avg_rating'),
-    func.count(Review.id).label('total_reviews')
-).filter_by(product_id=product_id).first()
-    
-    # Calcular distribución de ratings manualmente
-    all_reviews = Review.query.filter_by(product_id=product_id).all()
-    rating_distribution = {
-        '5_star': len([r for r in all_reviews if r.rating == 5]),
-        '4_star': len([r for r in all_reviews if r.rating == 4]),
-        '3_star': len([r for r in all_reviews if r.rating == 3]),
-        '2_star': len([r for r in all_reviews if r.rating == 2]),
-        '1_star': len([r for r in all_reviews if r.rating == 1])
-    }
+    # Estadísticas y distribución de ratings desde el histograma precalculado
+    stats = get_review_stats(product_id)
     
     return jsonify({
-        'reviews': [review.serialize() for review in reviews.items],
+        'reviews': [serializer(row) for row in reviews.items],
         'total': reviews.total,
         'pages': reviews.pages,
         'current_page': page,
-        'stats': {
-            'average_rating': float(stats.avg_rating or 0),
-            'total_reviews': int(stats.total_reviews or 0),
-            'rating_distribution': rating_distribution
-        }
+        'stats': stats
     }), 200
 
 @product_bp.route('/<int:product_id>/reviews', methods=['POST'])
@@ -792,7 +801,10 @@ def create_review(product_id):
         new_review.is_verified_purchase = verified_purchase is not None
         
         db.session.add(new_review)
+        db.session.flush()
+        apply_review_change(product_id, new_rating=rating)
         db.session.commit()
+        cache.bump('reviews')
         
         return jsonify({
             'message': 'Review creada exitosamente',
@@ -819,7 +831,11 @@ def update_review(review_id):
             rating = int(data['rating'])
             if rating < 1 or rating > 5:
                 return jsonify({'message': 'El rating debe estar entre 1 y 5'}), 400
+            # El rating nuevo se asigna antes: si falta el resumen, apply_review_change
+            # lo recalcula desde la tabla de reviews (con flush)
+            old_rating = review.rating
             review.rating = rating
+            apply_review_change(review.product_id, old_rating=old_rating, new_rating=rating)
         
         if 'title' in data:
             review.title = data['title']
@@ -828,6 +844,7 @@ def update_review(review_id):
             review.comment = data['comment']
         
         db.session.commit()
+        cache.bump('reviews')
         
         return jsonify({
             'message': 'Review actualizada exitosamente',
@@ -849,8 +866,12 @@ def delete_review(review_id):
         return jsonify({'message': 'Review no encontrada'}), 404
     
     try:
+        product_id, old_rating = review.product_id, review.rating
         db.session.delete(review)
+        db.session.flush()
+        apply_review_change(product_id, old_rating=old_rating)
         db.session.commit()
+        cache.bump('reviews')
         
         return jsonify({'message': 'Review eliminada exitosamente'}), 200
         
@@ -927,12 +948,27 @@ def get_user_reviews(user_id):
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
-    reviews = Review.query.filter_by(user_id=user_id).order_by(Review.creation_date.desc()).paginate(
+    serializer = review_serializer()
+    query = serializer.select(Review.query.filter_by(user_id=user_id))
+    
+    # Modo cursor (opcional): paginación por keyset, sin OFFSET ni COUNT
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        include_total = request.args.get('include_total', '').lower() == 'true'
+        sort_keys = [(Review.creation_date, True), (Review.id, True)]
+        try:
+            page_data = keyset_paginate(query, sort_keys, cursor, per_page, include_total)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        page_data['reviews'] = [serializer(row) for row in page_data.pop('items')]
+        return jsonify(page_data), 200
+    
+    reviews = query.order_by(Review.creation_date.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
     return jsonify({
-        'reviews': [review.serialize() for review in reviews.items],
+        'reviews': [serializer(row) for row in reviews.items],
         'total': reviews.total,
         'pages': reviews.pages,
         'current_page': page
@@ -949,13 +985,14 @@ def get_helpful_reviews(product_id):
         return jsonify({'message': 'Producto no encontrado'}), 404
     
     # Obtener las reviews más útiles
-    helpful_reviews = Review.query.filter_by(product_id=product_id).order_by(
+    serializer = review_serializer()
+    helpful_reviews = serializer.select(Review.query.filter_by(product_id=product_id)).order_by(
         Review.is_helpful.desc(), 
         Review.rating.desc(), 
         Review.creation_date.desc()
     ).limit(limit).all()
     
-    return jsonify([review.serialize() for review in helpful_reviews]), 200
+    return jsonify([serializer(row) for row in helpful_reviews]), 200
 
 # ==================== RUTAS DE DESCUENTOS ====================
 
@@ -1029,6 +1066,7 @@ def create_discount():
         
         db.session.add(new_discount)
         db.session.commit()
+        cache.bump('catalog')
         
         return jsonify({
             'message': 'Descuento creado exitosamente',
@@ -1083,6 +1121,7 @@ def update_discount(discount_id):
             discount.product_id = data['product_id']
         
         db.session.commit()
+        cache.bump('catalog')
         
         return jsonify({
             'message': 'Descuento actualizado exitosamente',
@@ -1113,12 +1152,14 @@ def delete_discount(discount_id):
     try:
         db.session.delete(discount)
         db.session.commit()
+        cache.bump('catalog')
         return jsonify({'message': 'Descuento eliminado exitosamente'}), 200
     except IntegrityError:
         db.session.rollback()
         return jsonify({'message': 'Error al eliminar el descuento'}), 400
 
 @product_bp.route('/discounts/active', methods=['GET'])
+@cache.cached('catalog', timeout=60)
 def get_active_discounts():
     """Obtener todos los descuentos actualmente activos"""
     from datetime import datetime
@@ -1159,27 +1200,42 @@ def get_product_discounts(product_id):
     return jsonify([discount.serialize() for discount in applicable_discounts]), 200
 
 @product_bp.route('/top-discounts-by-category', methods=['GET'])
+@cache.cached('catalog', 'stock')
 def get_top_discounts_by_category():
     """Obtener el producto con mayor descuento por categoría"""
     try:
-        # Obtener todas las categorías activas
-        categories = Category.query.all()
-        result = []
+        # Numerar los productos de cada categoría por descuento (el ID desempata)
+        ranked = db.session.query(
+            Product.id.label('product_id'),
+            func.row_number().over(
+                partition_by=Product.category_id,
+                order_by=(Product.discount_percentage.desc(), Product.id.asc())
+            ).label('position')
+        ).filter(
+            Product.category_id.isnot(None),
+            Product.is_active == True,
+            Product.discount_percentage > 0,
+            Product.stock > 0  # Solo productos en stock
+        ).subquery()
         
-        for category in categories:
-            # Buscar el producto con mayor descuento en esta categoría
-            top_discount_product = Product.query.filter(
-                Product.category_id == category.id,
-                Product.is_active == True,
-                Product.discount_percentage > 0,
-                Product.stock > 0  # Solo productos en stock
-            ).order_by(Product.discount_percentage.desc()).first()
-            
-            if top_discount_product:
-                result.append({
-                    'category': category.serialize(),
-                    'product': top_discount_product.serialize()
-                })
+        # Quedarse con el primero de cada categoría; producto y categoría se
+        # leen como columnas en la misma consulta (app/serializers.py)
+        products = product_serializer()
+        categories = product_category_serializer()
+        query = Product.query.join(
+            ranked, ranked.c.product_id == Product.id
+        ).filter(
+            ranked.c.position == 1
+        ).order_by(Product.category_id)
+        rows = products.select(query).add_columns(*categories.columns).all()
+        width = len(products.columns)
+        
+        result = [
+            {
+                'category': categories(row[width:]),
+                'product': products(row[:width])
+            } for row in rows
+        ]
         
         return jsonify(result), 200
         
@@ -4,6 +4,7 @@ from app import db  # type: ignore
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from app.guest_cart import merge_guest_cart_on_login
 
 user_bp = Blueprint('user_bp', __name__)
 
@@ -39,7 +40,11 @@ def login():
     user = User.query.filter_by(email=data['email']).first()
     if user and check_password_hash(user.password, data['password']):
         access_token = create_access_token(identity=str(user.id))
-        return jsonify({'message': 'Inicio de sesión exitoso', 'access_token': access_token}), 200
+        response = {'message': 'Inicio de sesión exitoso', 'access_token': access_token}
+        if data.get('guest_cart'):
+            # Pasar el carrito de invitado al del usuario; si falla, el login sigue siendo válido
+            response['cart_merged'] = merge_guest_cart_on_login(user.id, data['guest_cart'])
+        return jsonify(response), 200
     return jsonify({'message': 'Credenciales incorrectas'}), 401
 
 @user_bp.route('/me', methods=['GET'])
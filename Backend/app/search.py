@@ -0,0 +1,187 @@
+# search.py
+# Búsqueda de texto completo sobre los productos.
+#
+# - PostgreSQL: columna product.search_vector (tsvector) con índice GIN.
+#   El nombre y la marca/categoría pesan más que la descripción.
+# - SQLite (desarrollo): tabla virtual FTS5 product_search, con rowid = product.id.
+#   La crean la migración o flask rebuild-search-index; si falta se usa ILIKE.
+# - Otros motores: se vuelve al ILIKE de siempre.
+#
+# El índice se mantiene desde las rutas de administración de productos,
+# marcas y categorías (reindex_products / remove_products), dentro de la
+# misma transacción que la escritura. Las filas cargadas por fuera de la API
+# (scripts, SQL directo, importaciones) no quedan indexadas y la búsqueda no
+# las encuentra hasta correr flask rebuild-search-index.
+
+import re
+from flask import current_app
+from sqlalchemy import text, Integer, Float
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from . import db
+from .models import Product, Brand, Category
+
+# Máximo de términos que se usan de la búsqueda del usuario
+MAX_SEARCH_TERMS = 8
+
+# Pesos de bm25 para SQLite: name, brand, category, description
+FTS5_WEIGHTS = '10.0, 5.0, 5.0, 1.0'
+
+_fts5_ready = set()
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def _ts_config():
+    return current_app.config.get('SEARCH_TS_CONFIG', 'simple')
+
+
+def search_terms(term):
+    """Separa la búsqueda en palabras (solo caracteres alfanuméricos)"""
+    return re.findall(r'\w+', (term or '').lower())[:MAX_SEARCH_TERMS]
+
+
+def _fts5_available():
+    """
+    True si la tabla FTS5 de SQLite existe. La crean la migración o
+    flask rebuild-search-index, nunca una ruta de lectura: sin la tabla la
+    búsqueda usa ILIKE y las escrituras no mantienen el índice.
+    """
+    key = str(db.session.get_bind().url)
+    if key in _fts5_ready:
+        return True
+
+    exists = db.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_search'"
+    )).first()
+    if exists:
+        _fts5_ready.add(key)
+    return exists is not None
+
+
+def create_search_index():
+    """
+    Crea la tabla FTS5 en SQLite si falta y reindexa todo el catálogo
+    (en PostgreSQL solo reindexa). No hace commit.
+    """
+    if _dialect() == 'sqlite':
+        db.session.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5("
+            "name, brand, category, description, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    reindex_products()
+
+
+def _product_filter(product_ids=None, brand_id=None, category_id=None, alias='product'):
+    """Condición SQL para elegir qué productos reindexar"""
+    if product_ids is not None:
+        ids = ', '.join(str(int(product_id)) for product_id in product_ids) or 'NULL'
+        return f'{alias}.id IN ({ids})'
+    if brand_id is not None:
+        return f'{alias}.brand_id = {int(brand_id)}'
+    if category_id is not None:
+        return f'{alias}.category_id = {int(category_id)}'
+    return '1 = 1'
+
+
+def reindex_products(product_ids=None, brand_id=None, category_id=None):
+    """
+    Recalcula el índice de búsqueda de los productos indicados.
+    Sin argumentos reindexa todo el catálogo. No hace commit.
+
+    Args:
+        product_ids (list): IDs de productos a reindexar
+        brand_id (int): Reindexar los productos de una marca (cambio de nombre)
+        category_id (int): Reindexar los productos de una categoría
+    """
+    dialect = _dialect()
+
+    if dialect == 'postgresql':
+        condition = _product_filter(product_ids, brand_id, category_id)
+        db.session.execute(text(f"""
+            UPDATE product SET search_vector =
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(product.name, '')), 'A') ||
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(
+                    (SELECT brand.name FROM brand WHERE brand.id = product.brand_id), '')), 'B') ||
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(
+                    (SELECT category.name FROM category WHERE category.id = product.category_id), '')), 'B') ||
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(product.description, '')), 'D')
+            WHERE {condition}
+        """), {'config': _ts_config()})
+
+    elif dialect == 'sqlite' and _fts5_available():
+        condition = _product_filter(product_ids, brand_id, category_id, alias='p')
+        if product_ids is None and brand_id is None and category_id is None:
+            # Reindexado completo: también se descartan filas de productos que ya no existen
+            db.session.execute(text('DELETE FROM product_search'))
+        else:
+            db.session.execute(text(
+                f"DELETE FROM product_search WHERE rowid IN (SELECT p.id FROM product p WHERE {condition})"
+            ))
+        db.session.execute(text(f"""
+            INSERT INTO product_search (rowid, name, brand, category, description)
+            SELECT p.id, coalesce(p.name, ''), coalesce(b.name, ''), coalesce(c.name, ''), coalesce(p.description, '')
+            FROM product p
+            LEFT JOIN brand b ON b.id = p.brand_id
+            LEFT JOIN category c ON c.id = p.category_id
+            WHERE {condition}
+        """))
+
+
+def remove_products(product_ids):
+    """Quita productos del índice (en PostgreSQL el vector se borra con la fila)"""
+    if _dialect() == 'sqlite' and product_ids and _fts5_available():
+        ids = ', '.join(str(int(product_id)) for product_id in product_ids)
+        db.session.execute(text(f'DELETE FROM product_search WHERE rowid IN ({ids})'))
+
+
+def _ilike_search(query, term):
+    """Búsqueda de respaldo con ILIKE (no usa índices)"""
+    search_filter = f'%{term}%'
+    return query.filter(
+        db.or_(
+            Product.name.ilike(search_filter),
+            Product.description.ilike(search_filter),
+            Product.brand.has(Brand.name.ilike(search_filter)),
+            Product.category.has(Category.name.ilike(search_filter))
+        )
+    ), None
+
+
+def apply_search(query, term):
+    """
+    Filtra una consulta de productos por texto. Cada palabra se busca como
+    prefijo, así sirve tanto para el listado como para el autocompletado.
+
+    Args:
+        query: Consulta de Product
+        term (str): Texto buscado por el usuario
+
+    Returns:
+        tuple: (consulta filtrada, expresión de relevancia o None)
+    """
+    terms = search_terms(term)
+    if not terms:
+        return _ilike_search(query, term)
+
+    dialect = _dialect()
+
+    if dialect == 'postgresql':
+        ts_query = db.func.to_tsquery(
+            db.cast(_ts_config(), REGCONFIG),
+            ' & '.join(f'{t}:*' for t in terms)
+        )
+        rank = db.func.ts_rank(Product.search_vector, ts_query)
+        return query.filter(Product.search_vector.op('@@')(ts_query)), rank
+
+    if dialect == 'sqlite' and _fts5_available():
+        results = text(
+            f'SELECT rowid AS product_id, -bm25(product_search, {FTS5_WEIGHTS}) AS rank '
+            'FROM product_search WHERE product_search MATCH :match'
+        ).bindparams(match=' '.join(f'"{t}"*' for t in terms))
+        results = results.columns(product_id=Integer, rank=Float).subquery('search_results')
+        query = query.join(results, Product.id == results.c.product_id)
+        return query, results.c.rank
+
+    return _ilike_search(query, term)
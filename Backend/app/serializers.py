@@ -0,0 +1,272 @@
+# serializers.py
+# Serialización por columnas para los listados de productos, reviews, órdenes
+# y la categoría de cada producto.
+#
+# En lugar de cargar objetos ORM (identity map, atributos instrumentados,
+# relaciones) y llamar a serialize(), estas consultas seleccionan solo las
+# columnas que usa la respuesta y arman el dict desde la tupla. La salida es
+# la misma que la de Product/Review/Order.serialize().
+#
+# Uso: la consulta se arma con los filtros y el orden de siempre sobre el
+# modelo y se convierte antes de paginar (serializer.select, order_rows);
+# cada fila se serializa con el serializador o con serialize_order_row.
+# Productos y reviews aceptan un subconjunto de campos (fields=): la consulta
+# lee solo las columnas de esos campos.
+
+from sqlalchemy.orm import aliased
+from . import db
+from .models import Product, Category, Brand, Review, User, Order, OrderItem, Address
+
+# Alias propios para que los joins no choquen con los que ya tenga la consulta
+_category = aliased(Category)
+_brand = aliased(Brand)
+_author = aliased(User)
+_address = aliased(Address)
+_subcategory = aliased(Category)
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# Campos de producto: nombre -> (columnas que lee, función que arma el valor
+# a partir de esas columnas; None si el valor es la columna tal cual)
+PRODUCT_FIELDS = {
+    'id': ((Product.id,), None),
+    'name': ((Product.name,), None),
+    'description': ((Product.description,), None),
+    'price': ((Product.price,), None),
+    'final_price': ((Product.price, Product.discount_percentage), Product.price_after_discount),
+    'has_discount': ((Product.discount_percentage,), lambda discount_percentage: discount_percentage > 0),
+    'discount_percentage': ((Product.discount_percentage,), None),
+    'stock': ((Product.stock,), None),
+    'image_url': ((Product.image_url,), None),
+    'images': ((Product.images,), None),
+    'creation_date': ((Product.creation_date,), _isoformat),
+    'category_id': ((Product.category_id,), None),
+    'category': ((_category.name,), None),
+    'brand_id': ((Product.brand_id,), None),
+    'brand': ((_brand.name,), None),
+    'is_active': ((Product.is_active,), None),
+}
+
+# Joins que necesita cada campo
+PRODUCT_JOINS = {
+    'category': (_category, Product.category_id == _category.id),
+    'brand': (_brand, Product.brand_id == _brand.id),
+}
+
+REVIEW_FIELDS = {
+    'id': ((Review.id,), None),
+    'user_id': ((Review.user_id,), None),
+    'user_name': ((_author.username,), None),
+    'product_id': ((Review.product_id,), None),
+    'rating': ((Review.rating,), None),
+    'title': ((Review.title,), None),
+    'comment': ((Review.comment,), None),
+    'creation_date': ((Review.creation_date,), lambda creation_date: creation_date.isoformat()),
+    'is_verified_purchase': ((Review.is_verified_purchase,), None),
+    'is_helpful': ((Review.is_helpful,), None),
+}
+
+REVIEW_JOINS = {
+    'user_name': (_author, Review.user_id == _author.id),
+}
+
+# Categoría del producto: usa el mismo alias que el campo 'category' de
+# PRODUCT_FIELDS, así que va junto a un product_serializer que lo incluya.
+# has_subcategories es un EXISTS en la misma fila, sin cargar subcategorías
+CATEGORY_FIELDS = {
+    'id': ((_category.id,), None),
+    'name': ((_category.name,), None),
+    'description': ((_category.description,), None),
+    'creation_date': ((_category.creation_date,), lambda creation_date: creation_date.isoformat()),
+    'parent_id': ((_category.parent_id,), None),
+    'has_subcategories': (
+        (db.exists().where(_subcategory.parent_id == _category.id).label('has_subcategories'),),
+        bool
+    ),
+}
+
+
+class ColumnSerializer:
+    """
+    Serializa filas de una consulta de columnas con un subconjunto de campos.
+
+    Uso:
+        serializer = product_serializer(['id', 'name'])
+        rows = serializer.select(query).all()
+        data = [serializer(row) for row in rows]
+    """
+
+    def __init__(self, field_map, joins, fields=None):
+        fields = list(field_map) if fields is None else fields
+        self.columns = []
+        positions = {}
+        self.fields = []
+        for name in fields:
+            columns, compute = field_map[name]
+            indexes = []
+            for column in columns:
+                if id(column) not in positions:
+                    positions[id(column)] = len(self.columns)
+                    self.columns.append(column)
+                indexes.append(positions[id(column)])
+            self.fields.append((name, indexes, compute))
+        self.joins = [joins[name] for name in fields if name in joins]
+
+    def select(self, query):
+        """Consulta del modelo (sin opciones de carga) -> consulta de las columnas necesarias"""
+        for target, on in self.joins:
+            query = query.outerjoin(target, on)
+        return query.with_entities(*self.columns)
+
+    def __call__(self, row):
+        data = {}
+        for name, indexes, compute in self.fields:
+            if compute is None:
+                data[name] = row[indexes[0]]
+            else:
+                data[name] = compute(*[row[index] for index in indexes])
+        return data
+
+
+def parse_fields(raw, allowed):
+    """
+    Lee el parámetro fields= ('id,name,price').
+
+    Args:
+        raw (str): Valor del parámetro (None o '' = todos los campos)
+        allowed (iterable): Campos válidos
+
+    Returns:
+        list: Campos pedidos (siempre incluye 'id'), o None para todos
+
+    Raises:
+        ValueError: Si se pide un campo que no existe
+    """
+    if not raw:
+        return None
+    fields = ['id']
+    for name in raw.split(','):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f'Campos inválidos: {", ".join(unknown)}')
+    return fields
+
+
+def product_serializer(fields=None):
+    """Serializador de productos; sin fields, mismo formato que Product.serialize()"""
+    return ColumnSerializer(PRODUCT_FIELDS, PRODUCT_JOINS, fields)
+
+
+def review_serializer(fields=None):
+    """Serializador de reviews; sin fields, mismo formato que Review.serialize()"""
+    return ColumnSerializer(REVIEW_FIELDS, REVIEW_JOINS, fields)
+
+
+def product_category_serializer():
+    """
+    Serializador de la categoría de cada producto (mismo formato que
+    Category.serialize()). Sus columnas se agregan a las de un
+    product_serializer con el campo 'category':
+
+        products = product_serializer()
+        categories = product_category_serializer()
+        rows = products.select(query).add_columns(*categories.columns).all()
+        width = len(products.columns)
+        data = [(products(row[:width]), categories(row[width:])) for row in rows]
+    """
+    return ColumnSerializer(CATEGORY_FIELDS, {})
+
+
+ADDRESS_COLUMNS = (
+    _address.id, _address.user_id, _address.street, _address.city, _address.state,
+    _address.zip_code, _address.country, _address.extra_info, _address.is_default
+)
+
+ORDER_COLUMNS = (
+    Order.id, Order.user_id, Order.creation_date, Order.total_amount, Order.status,
+    Order.address_id, *ADDRESS_COLUMNS
+)
+
+ORDER_ITEM_COLUMNS = (
+    OrderItem.id, OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price,
+    OrderItem.unit_final_price, OrderItem.creation_date, OrderItem.product_name,
+    OrderItem.product_image_url, OrderItem.brand_name, OrderItem.category_name
+)
+
+
+def order_rows(query):
+    """Consulta de Order (sin opciones de carga) -> tuplas ORDER_COLUMNS"""
+    return query.outerjoin(_address, Order.address_id == _address.id).with_entities(*ORDER_COLUMNS)
+
+
+def serialize_order_row(row):
+    """Mismo formato que Order.serialize()"""
+    order_id, user_id, creation_date, total_amount, status, address_id = row[:6]
+    (address_row_id, address_user_id, street, city, state, zip_code, country, extra_info,
+     is_default) = row[6:]
+    return {
+        'id': order_id,
+        'user_id': user_id,
+        'creation_date': creation_date.isoformat(),
+        'total_amount': total_amount,
+        'status': status,
+        'address_id': address_id,
+        'address': {
+            'id': address_row_id,
+            'user_id': address_user_id,
+            'street': street,
+            'city': city,
+            'state': state,
+            'zip_code': zip_code,
+            'postal_code': zip_code,
+            'country': country,
+            'extra_info': extra_info,
+            'is_default': is_default
+        } if address_row_id is not None else None
+    }
+
+
+def serialize_order_item_row(row):
+    """Mismo formato que OrderItem.serialize_snapshot()"""
+    (item_id, order_id, product_id, quantity, price, unit_final_price, creation_date,
+     product_name, product_image_url, brand_name, category_name) = row
+    return {
+        'id': item_id,
+        'order_id': order_id,
+        'product_id': product_id,
+        'quantity': quantity,
+        'price': price,
+        'unit_final_price': unit_final_price,
+        'creation_date': creation_date.isoformat(),
+        'product': {
+            'id': product_id,
+            'name': product_name,
+            'image_url': product_image_url,
+            'images': [product_image_url] if product_image_url else [],
+            'brand': brand_name,
+            'category': category_name
+        }
+    }
+
+
+def order_items_by_order(order_ids):
+    """
+    Items serializados de varias órdenes en una sola consulta.
+
+    Returns:
+        dict: {order_id: [item, ...]} con los items ordenados por ID
+    """
+    items = {order_id: [] for order_id in order_ids}
+    if not order_ids:
+        return items
+    for row in db.session.execute(
+        db.select(*ORDER_ITEM_COLUMNS).where(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id)
+    ):
+        items[row[1]].append(serialize_order_item_row(row))
+    return items
@@ -0,0 +1,142 @@
+# stats.py
+# Estadísticas del catálogo para los filtros dinámicos (/api/products/stats).
+#
+# - PostgreSQL: una sola consulta con GROUPING SETS que devuelve los totales,
+#   los conteos por categoría y los conteos por marca en una pasada.
+# - Otros motores: una consulta de totales con agregados condicionales y
+#   otra con los conteos por categoría y por marca unidos con UNION ALL.
+#
+# El resultado se cachea por versión del catálogo en la ruta (cache.cached).
+
+from sqlalchemy import select, func, case, literal, union_all, tuple_
+from . import db
+from .models import Product, Category, Brand, ProductRatingSummary
+
+# Valores de grouping(category.id, brand.id) para cada conjunto
+GROUPED_BY_CATEGORY = 1
+GROUPED_BY_BRAND = 2
+GROUPED_TOTAL = 3
+
+
+def _totals_columns():
+    """Agregados del catálogo activo más el rating global del resumen"""
+    return [
+        func.count(Product.id).label('total_products'),
+        func.min(Product.price).label('min_price'),
+        func.max(Product.price).label('max_price'),
+        func.avg(Product.price).label('avg_price'),
+        func.sum(case((Product.stock > 0, 1), else_=0)).label('in_stock'),
+        func.sum(case((Product.stock == 0, 1), else_=0)).label('out_of_stock'),
+        func.sum(case((Product.discount_percentage > 0, 1), else_=0)).label('with_discount'),
+        func.sum(case((Product.discount_percentage == 0, 1), else_=0)).label('without_discount'),
+        select(func.sum(ProductRatingSummary.rating_sum)).scalar_subquery().label('rating_sum'),
+        select(func.sum(ProductRatingSummary.review_count)).scalar_subquery().label('review_count')
+    ]
+
+
+def _serialize(totals, category_counts, brand_counts):
+    review_count = int(totals.review_count or 0)
+    return {
+        'total_products': int(totals.total_products or 0),
+        'price_range': {
+            'min': float(totals.min_price or 0),
+            'max': float(totals.max_price or 0),
+            'average': float(totals.avg_price or 0)
+        },
+        'categories': [
+            {'name': name, 'product_count': count} for name, count in category_counts
+        ],
+        'brands': [
+            {'name': name, 'product_count': count} for name, count in brand_counts
+        ],
+        'stock_status': {
+            'in_stock': int(totals.in_stock or 0),
+            'out_of_stock': int(totals.out_of_stock or 0)
+        },
+        'discount_status': {
+            'with_discount': int(totals.with_discount or 0),
+            'without_discount': int(totals.without_discount or 0)
+        },
+        'rating_stats': {
+            'average_rating': float(totals.rating_sum) / review_count if review_count else 0.0,
+            'total_reviews': review_count
+        }
+    }
+
+
+def _grouping_sets_stats():
+    """Una pasada sobre product con GROUPING SETS (PostgreSQL)"""
+    statement = (
+        select(
+            func.grouping(Category.id, Brand.id).label('grouping_set'),
+            Category.name.label('category_name'),
+            Brand.name.label('brand_name'),
+            *_totals_columns()
+        )
+        .select_from(Product)
+        .outerjoin(Category, Product.category_id == Category.id)
+        .outerjoin(Brand, Product.brand_id == Brand.id)
+        .where(Product.is_active == True)
+        .group_by(func.grouping_sets(
+            tuple_(Category.id, Category.name),
+            tuple_(Brand.id, Brand.name),
+            tuple_()
+        ))
+        .order_by(Category.id, Brand.id)
+    )
+
+    totals = None
+    category_counts = []
+    brand_counts = []
+    for row in db.session.execute(statement):
+        if row.grouping_set == GROUPED_TOTAL:
+            totals = row
+        elif row.grouping_set == GROUPED_BY_CATEGORY and row.category_name is not None:
+            category_counts.append((row.category_name, row.total_products))
+        elif row.grouping_set == GROUPED_BY_BRAND and row.brand_name is not None:
+            brand_counts.append((row.brand_name, row.total_products))
+
+    return _serialize(totals, category_counts, brand_counts)
+
+
+def _portable_stats():
+    """Totales con agregados condicionales + conteos por categoría y marca"""
+    totals = db.session.execute(
+        select(*_totals_columns()).where(Product.is_active == True)
+    ).one()
+
+    by_category = (
+        select(literal('category').label('kind'), Category.id, Category.name, func.count(Product.id))
+        .join(Product, Product.category_id == Category.id)
+        .where(Product.is_active == True)
+        .group_by(Category.id, Category.name)
+    )
+    by_brand = (
+        select(literal('brand').label('kind'), Brand.id, Brand.name, func.count(Product.id))
+        .join(Product, Product.brand_id == Brand.id)
+        .where(Product.is_active == True)
+        .group_by(Brand.id, Brand.name)
+    )
+    counts = union_all(by_category, by_brand).subquery()
+
+    category_counts = []
+    brand_counts = []
+    for kind, _, name, count in db.session.execute(
+        select(counts).order_by(counts.c.kind, counts.c.id)
+    ):
+        (category_counts if kind == 'category' else brand_counts).append((name, count))
+
+    return _serialize(totals, category_counts, brand_counts)
+
+
+def get_catalog_stats():
+    """
+    Estadísticas de los productos activos: rango de precios, conteos por
+    categoría y marca, stock, descuentos y rating global.
+
+    Returns:
+        dict: Mismo formato que devolvía /api/products/stats
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return _grouping_sets_stats()
+    return _portable_stats()
@@ -1,7 +1,14 @@
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
-from flask import jsonify, request
+from flask import jsonify, request, g, has_request_context
 from app.models import User
 from functools import wraps
+from contextlib import contextmanager
+from sqlalchemy import event, and_, or_, func, DateTime
+from sqlalchemy.engine import Engine
+import base64
+import binascii
+import hashlib
+import json
 import secrets
 from datetime import datetime, timedelta
 
@@ -140,6 +147,183 @@ def paginate_query(query, page=1, per_page=10):
         'has_prev': pagination.has_prev
     }
 
+def encode_cursor(values, sort=''):
+    """
+    Codifica los valores de la última fila de una página en un cursor opaco.
+
+    Args:
+        values (list): Valores de las claves de orden (el último es el ID)
+        sort (str): Orden que produjo la página (ver sort_signature)
+
+    Returns:
+        str: Cursor en base64 apto para URL
+    """
+    def encode_value(value):
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        return value
+
+    raw = json.dumps({'s': sort, 'v': [encode_value(value) for value in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, sort=''):
+    """
+    Decodifica un cursor generado por encode_cursor.
+
+    Args:
+        cursor (str): Cursor recibido
+        sort (str): Orden de la consulta actual; debe ser el mismo del cursor
+
+    Raises:
+        ValueError: Si el cursor no es válido o es de otro orden
+    """
+    def decode_value(value):
+        if isinstance(value, dict):
+            return datetime.fromisoformat(value['dt'])
+        return value
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if not isinstance(data, dict) or data.get('s') != sort or not isinstance(data.get('v'), list):
+            raise ValueError('Cursor inválido')
+        return [decode_value(value) for value in data['v']]
+    except (binascii.Error, UnicodeDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError('Cursor inválido')
+
+def _sort_keys(sort_keys):
+    """Claves de orden como (expresión, descendente, admite NULL); la tercera es opcional"""
+    return [(key[0], key[1], len(key) > 2 and key[2]) for key in sort_keys]
+
+def sort_signature(sort_keys):
+    """
+    Identifica un orden (claves y sentido). Va dentro del cursor para que
+    no se pueda seguir con otro orden: compararía, por ejemplo, un nombre
+    contra una columna numérica.
+    """
+    raw = ','.join(
+        f'{expression}:{"desc" if descending else "asc"}'
+        for expression, descending, _ in _sort_keys(sort_keys)
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+def order_by_keys(query, sort_keys):
+    """
+    Ordena una consulta por una lista de (expresión, descendente) o
+    (expresión, descendente, admite NULL). Las claves que admiten NULL dejan
+    esas filas al final en ambos sentidos.
+    """
+    clauses = []
+    for expression, descending, nullable in _sort_keys(sort_keys):
+        clause = expression.desc() if descending else expression.asc()
+        clauses.append(clause.nulls_last() if nullable else clause)
+    return query.order_by(*clauses)
+
+def _seek_condition(sort_keys, values):
+    """
+    Filas posteriores al cursor en el orden dado:
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... (con < para las claves descendentes)
+    En las claves que admiten NULL, NULL va después de cualquier valor.
+    """
+    sort_keys = _sort_keys(sort_keys)
+
+    def equal(expression, value):
+        return expression.is_(None) if value is None else expression == value
+
+    conditions = []
+    for position, (expression, descending, nullable) in enumerate(sort_keys):
+        value = values[position]
+        if value is None:
+            # Después de un NULL solo hay más NULL: decide la clave siguiente
+            continue
+        after = expression < value if descending else expression > value
+        if nullable:
+            after = or_(after, expression.is_(None))
+        previous = [equal(sort_keys[i][0], values[i]) for i in range(position)]
+        conditions.append(and_(*previous, after))
+
+    # Condición redundante sobre la primera clave para que se pueda usar su índice
+    first, descending, nullable = sort_keys[0]
+    if values[0] is None:
+        bound = first.is_(None)
+    else:
+        bound = first <= values[0] if descending else first >= values[0]
+        if nullable:
+            bound = or_(bound, first.is_(None))
+    return and_(bound, or_(*conditions))
+
+def keyset_paginate(query, sort_keys, cursor=None, per_page=10, include_total=False):
+    """
+    Paginación por cursor (keyset). En lugar de OFFSET filtra por las claves
+    de orden de la última fila vista, así cada página cuesta lo mismo sin
+    importar qué tan profunda sea. El total solo se cuenta si se pide.
+
+    Args:
+        query: Consulta de SQLAlchemy sin order_by (de una entidad o de columnas)
+        sort_keys (list): [(expresión, descendente)] o [(expresión, descendente,
+            admite NULL)]; la última clave debe ser única (el ID) y solo las
+            marcadas pueden ser NULL (esas filas van al final)
+        cursor (str): Cursor de la página anterior ('' o None = primera página)
+        per_page (int): Elementos por página
+        include_total (bool): Si True agrega 'total' (una consulta COUNT extra)
+
+    Returns:
+        dict: Diccionario con 'items' (objetos, o tuplas en las consultas de
+            columnas, aunque sea una sola), 'next_cursor', 'has_next', 'per_page' y 'total' si se pidió
+
+    Raises:
+        ValueError: Si el cursor no es válido o lo generó otro orden
+    """
+    if per_page < 1:
+        per_page = 10
+    if per_page > 100:
+        per_page = 100
+
+    total = query.order_by(None).count() if include_total else None
+    sort = sort_signature(sort_keys)
+
+    if query.session.get_bind().dialect.name == 'sqlite':
+        # SQLite guarda las fechas como texto en formatos distintos (con y sin
+        # microsegundos); se comparan normalizadas para no saltear empates
+        sort_keys = [
+            (func.strftime('%Y-%m-%d %H:%M:%f', expression) if isinstance(expression.type, DateTime) else expression,
+             descending, nullable)
+            for expression, descending, nullable in _sort_keys(sort_keys)
+        ]
+
+    # Columnas de la consulta antes de agregar las claves de orden: una
+    # entidad (se devuelve el objeto) o columnas (se devuelven tuplas)
+    descriptions = query.column_descriptions
+    width = len(descriptions)
+    entity_query = width == 1 and descriptions[0]['expr'] is descriptions[0]['entity']
+
+    # Las claves de orden se leen junto con cada fila para armar el próximo cursor
+    page_query = query.add_columns(*[
+        expression.label(f'cursor_{position}')
+        for position, (expression, *_) in enumerate(sort_keys)
+    ])
+    if cursor:
+        values = decode_cursor(cursor, sort)
+        if len(values) != len(sort_keys):
+            raise ValueError('Cursor inválido')
+        page_query = page_query.filter(_seek_condition(sort_keys, values))
+
+    rows = order_by_keys(page_query, sort_keys).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    # Cada fila trae primero la entidad (o las columnas, en las consultas de
+    # app/serializers.py) y al final las claves de orden
+    result = {
+        'items': [row[0] if entity_query else tuple(row[:width]) for row in rows],
+        'next_cursor': encode_cursor(list(rows[-1][width:]), sort) if has_next else None,
+        'has_next': has_next,
+        'per_page': per_page
+    }
+    if include_total:
+        result['total'] = total
+    return result
+
 def format_error_response(error, status_code=400):
     """
     Formatea una respuesta de error consistente.
@@ -178,3 +362,49 @@ def generate_token(length=32):
 def get_expiration(hours=1):
     """Get a datetime object for expiration (default: 1 hour from now)."""
     return datetime.utcnow() + timedelta(hours=hours)
+
+class QueryCounter:
+    """Contador de sentencias SQL (ver count_queries)."""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+@contextmanager
+def count_queries():
+    """
+    Cuenta las sentencias SQL ejecutadas dentro del bloque.
+    Útil para detectar regresiones N+1 en los endpoints.
+
+    Uso:
+        with count_queries() as counter:
+            client.get('/api/products/')
+        assert counter.count <= 5
+    """
+    counter = QueryCounter()
+    event.listen(Engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(Engine, 'before_cursor_execute', counter)
+
+def _count_request_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_query_count = g.get('sql_query_count', 0) + 1
+
+def register_query_counter(app):
+    """
+    Agrega la cabecera X-SQL-Query-Count a cada respuesta con la cantidad
+    de sentencias SQL que ejecutó el endpoint.
+    """
+    if not event.contains(Engine, 'before_cursor_execute', _count_request_query):
+        event.listen(Engine, 'before_cursor_execute', _count_request_query)
+
+    @app.after_request
+    def add_query_count_header(response):
+        response.headers['X-SQL-Query-Count'] = str(g.get('sql_query_count', 0))
+        return response
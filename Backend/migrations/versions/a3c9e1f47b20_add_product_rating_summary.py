@@ -0,0 +1,58 @@
+"""add product rating summary
+
+Revision ID: a3c9e1f47b20
+Revises: 5f0400322a28
+Create Date: 2026-10-17 10:12:41.508312
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e1f47b20'
+down_revision = '5f0400322a28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_rating_summary',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('review_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_1', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_2', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_3', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_4', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('rating_5', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('avg_rating', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    with op.batch_alter_table('product_rating_summary', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_product_rating_summary_avg_rating'), ['avg_rating'], unique=False)
+
+    # Backfill desde las reviews existentes
+    op.execute("""
+        INSERT INTO product_rating_summary
+            (product_id, review_count, rating_sum, rating_1, rating_2, rating_3, rating_4, rating_5, avg_rating)
+        SELECT product_id,
+               COUNT(id),
+               SUM(rating),
+               SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END),
+               AVG(rating * 1.0)
+        FROM review
+        GROUP BY product_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('product_rating_summary', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_rating_summary_avg_rating'))
+
+    op.drop_table('product_rating_summary')
@@ -0,0 +1,68 @@
+"""add product full text search
+
+Revision ID: b7d2f4a91c3e
+Revises: a3c9e1f47b20
+Create Date: 2026-10-17 11:02:17.734920
+
+"""
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a91c3e'
+down_revision = 'a3c9e1f47b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.batch_alter_table('product', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+            batch_op.create_index('ix_product_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+        # Backfill: nombre (A), marca y categoría (B), descripción (D), con la
+        # misma configuración de texto que usa la app (SEARCH_TS_CONFIG). Si
+        # después se cambia SEARCH_TS_CONFIG hay que correr flask rebuild-search-index
+        op.execute(sa.text("""
+            UPDATE product SET search_vector =
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(product.name, '')), 'A') ||
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(
+                    (SELECT brand.name FROM brand WHERE brand.id = product.brand_id), '')), 'B') ||
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(
+                    (SELECT category.name FROM category WHERE category.id = product.category_id), '')), 'B') ||
+                setweight(to_tsvector(CAST(:config AS regconfig), coalesce(product.description, '')), 'D')
+        """).bindparams(config=current_app.config.get('SEARCH_TS_CONFIG', 'simple')))
+
+    elif dialect == 'sqlite':
+        with op.batch_alter_table('product', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_vector', sa.Text(), nullable=True))
+
+        op.execute(
+            "CREATE VIRTUAL TABLE product_search USING fts5("
+            "name, brand, category, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute("""
+            INSERT INTO product_search (rowid, name, brand, category, description)
+            SELECT p.id, coalesce(p.name, ''), coalesce(b.name, ''), coalesce(c.name, ''), coalesce(p.description, '')
+            FROM product p
+            LEFT JOIN brand b ON b.id = p.brand_id
+            LEFT JOIN category c ON c.id = p.category_id
+        """)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS product_search')
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        if dialect == 'postgresql':
+            batch_op.drop_index('ix_product_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
@@ -0,0 +1,50 @@
+"""add query path indexes
+
+Revision ID: c5e8a2d7f613
+Revises: b7d2f4a91c3e
+Create Date: 2026-10-17 15:04:27.913846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a2d7f613'
+down_revision = 'b7d2f4a91c3e'
+branch_labels = None
+depends_on = None
+
+# Índices parciales: el listado de productos siempre filtra is_active
+ACTIVE_ONLY = {
+    'postgresql_where': sa.text('is_active'),
+    'sqlite_where': sa.text('is_active = 1'),
+}
+
+# (nombre, tabla, columnas, opciones)
+INDEXES = [
+    ('ix_product_active_category_id', 'product', ['category_id'], ACTIVE_ONLY),
+    ('ix_product_active_price', 'product', ['price', 'id'], ACTIVE_ONLY),
+    ('ix_product_active_discount_percentage', 'product', ['discount_percentage', 'id'], ACTIVE_ONLY),
+    ('ix_product_brand_id', 'product', ['brand_id'], {}),
+    ('ix_review_product_id_rating', 'review', ['product_id', 'rating'], {}),
+    ('ix_review_user_id_creation_date', 'review', ['user_id', 'creation_date'], {}),
+    ('ix_cart_user_id_is_active', 'cart', ['user_id', 'is_active'], {}),
+    ('ix_cart_item_cart_id_product_id', 'cart_item', ['cart_id', 'product_id'], {}),
+    ('ix_order_user_id_creation_date', 'order', ['user_id', 'creation_date'], {}),
+    ('ix_order_creation_date', 'order', ['creation_date'], {}),
+    ('ix_order_item_order_id', 'order_item', ['order_id'], {}),
+    ('ix_payment_status_creation_date', 'payment', ['status', 'creation_date'], {}),
+    ('ix_payment_creation_date', 'payment', ['creation_date'], {}),
+    ('ix_address_user_id_is_default', 'address', ['user_id', 'is_default'], {}),
+]
+
+
+def upgrade():
+    for name, table, columns, options in INDEXES:
+        op.create_index(name, table, columns, unique=False, **options)
+
+
+def downgrade():
+    for name, table, columns, options in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,50 @@
+"""unique cart item per product
+
+Revision ID: d9b3f6e1a8c4
+Revises: c5e8a2d7f613
+Create Date: 2026-10-17 17:21:09.284517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9b3f6e1a8c4'
+down_revision = 'c5e8a2d7f613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Unificar las filas repetidas: la de menor ID se queda con la suma
+    op.execute("""
+        UPDATE cart_item SET quantity = (
+            SELECT SUM(duplicate.quantity) FROM cart_item AS duplicate
+            WHERE duplicate.cart_id = cart_item.cart_id
+              AND duplicate.product_id = cart_item.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart_item
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM cart_item
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM cart_item
+            GROUP BY cart_id, product_id
+        )
+    """)
+
+    # La restricción única ya crea su propio índice sobre (cart_id, product_id)
+    op.drop_index('ix_cart_item_cart_id_product_id', table_name='cart_item')
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_cart_item_cart_id_product_id', ['cart_id', 'product_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('cart_item', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_cart_item_cart_id_product_id', type_='unique')
+    op.create_index('ix_cart_item_cart_id_product_id', 'cart_item', ['cart_id', 'product_id'], unique=False)
@@ -0,0 +1,71 @@
+"""add order item product snapshot
+
+Revision ID: e1c7a4f29b5d
+Revises: d9b3f6e1a8c4
+Create Date: 2026-10-17 18:42:51.607213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1c7a4f29b5d'
+down_revision = 'd9b3f6e1a8c4'
+branch_labels = None
+depends_on = None
+
+SNAPSHOT_COLUMNS = [
+    ('product_name', sa.String(length=120)),
+    ('product_image_url', sa.String(length=255)),
+    ('brand_name', sa.String(length=120)),
+    ('category_name', sa.String(length=120)),
+    ('unit_final_price', sa.Float()),
+]
+
+
+def upgrade():
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        for name, type_ in SNAPSHOT_COLUMNS:
+            batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+    backfill_snapshots()
+
+
+def backfill_snapshots():
+    """
+    Backfill de las órdenes existentes con los datos actuales del producto.
+    unit_final_price es el precio unitario cobrado. Hasta este cambio el
+    total de la orden se calculaba con el precio de lista (price), así que
+    para las líneas viejas es price y la suma de las líneas da total_amount.
+    """
+    if op.get_bind().dialect.name == 'postgresql':
+        image = 'COALESCE(product.images[1], product.image_url)'
+    else:
+        image = 'product.image_url'
+
+    op.execute(f"""
+        UPDATE order_item SET
+            product_name = (
+                SELECT product.name FROM product WHERE product.id = order_item.product_id
+            ),
+            product_image_url = (
+                SELECT {image} FROM product WHERE product.id = order_item.product_id
+            ),
+            brand_name = (
+                SELECT brand.name FROM product JOIN brand ON brand.id = product.brand_id
+                WHERE product.id = order_item.product_id
+            ),
+            category_name = (
+                SELECT category.name FROM product JOIN category ON category.id = product.category_id
+                WHERE product.id = order_item.product_id
+            ),
+            unit_final_price = price
+        WHERE product_name IS NULL
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        for name, _ in reversed(SNAPSHOT_COLUMNS):
+            batch_op.drop_column(name)
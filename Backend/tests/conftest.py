@@ -0,0 +1,132 @@
+# conftest.py
+# Configuración de pytest: la app real (create_app) sobre una base SQLite
+# temporal que se recrea en cada test, más datos de ejemplo y helpers.
+
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# La URL de la base se lee al importar la configuración: hay que definirla antes
+_db_dir = tempfile.mkdtemp(prefix='dr_shopper_tests_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+
+
+@compiles(ARRAY, 'sqlite')
+def _compile_array_sqlite(type_, compiler, **kw):
+    # product.images es ARRAY en PostgreSQL; en SQLite alcanza con TEXT (los tests no lo usan)
+    return 'TEXT'
+
+
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.cache import cache
+from app.autocomplete import autocomplete_index
+from app.search import create_search_index
+from app.models import User, Category, Brand, Product, Review, Cart, CartItem, Address, Order, OrderItem
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture(autouse=True)
+def database(app):
+    """Base vacía (con la tabla de búsqueda), caché y autocompletado limpios en cada test"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        create_search_index()
+        db.session.commit()
+        cache.backend.clear()
+        autocomplete_index.invalidate()
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def auth_headers(user_id):
+    """Cabecera Authorization con un JWT para el usuario"""
+    return {'Authorization': 'Bearer ' + create_access_token(identity=str(user_id))}
+
+
+@pytest.fixture
+def catalog():
+    """
+    Catálogo de ejemplo: 2 usuarios (el primero admin), 2 categorías,
+    2 marcas y 6 productos activos con stock 5.
+    """
+    users = [
+        User(username='admin', email='admin@example.com', password='x', is_admin=True),
+        User(username='ana', email='ana@example.com', password='x'),
+    ]
+    categories = [Category(name='Celulares'), Category(name='Audio')]
+    brands = [Brand(name='Samsung'), Brand(name='Sony')]
+    db.session.add_all(users + categories + brands)
+    db.session.flush()
+
+    products = []
+    for position in range(6):
+        products.append(Product(
+            name=f'Producto {position} galaxy' if position % 2 else f'Producto {position}',
+            description='Descripción',
+            price=100 + position * 10,
+            stock=5,
+            discount_percentage=10.0 * (position % 3),
+            category_id=categories[position % 2].id,
+            brand_id=brands[position % 2].id,
+            is_active=True
+        ))
+    db.session.add_all(products)
+    db.session.commit()
+
+    return {'users': users, 'categories': categories, 'brands': brands, 'products': products}
+
+
+def add_reviews(product, ratings, users):
+    """Crea reviews (sin pasar por las rutas) con los ratings dados"""
+    for position, rating in enumerate(ratings):
+        db.session.add(Review(user_id=users[position % len(users)].id, product_id=product.id, rating=rating))
+    db.session.commit()
+
+
+def add_cart(user, items):
+    """Carrito activo con items [(producto, cantidad)]"""
+    cart = Cart(user_id=user.id, is_active=True)
+    db.session.add(cart)
+    db.session.flush()
+    for product, quantity in items:
+        db.session.add(CartItem(cart_id=cart.id, product_id=product.id, quantity=quantity))
+    db.session.commit()
+    return cart
+
+
+def add_orders(user, products, count, items_per_order=2):
+    """Órdenes con items, todas con la misma dirección"""
+    address = Address(user_id=user.id, street='Calle 1', city='Ciudad', country='AR', is_default=True)
+    db.session.add(address)
+    db.session.flush()
+    for position in range(count):
+        order = Order(user_id=user.id, total_amount=100, status='pending', address_id=address.id)
+        db.session.add(order)
+        db.session.flush()
+        for product in products[position:position + items_per_order]:
+            db.session.add(OrderItem(
+                order_id=order.id, product_id=product.id, quantity=1, price=product.price,
+                product_name=product.name, unit_final_price=product.price
+            ))
+    db.session.commit()
+    return address
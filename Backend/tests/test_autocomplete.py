@@ -0,0 +1,53 @@
+# test_autocomplete.py
+# Autocompletado: el índice en memoria resuelve el prefijo y los campos
+# vivos (precio, stock) se leen de la base en cada pedido.
+
+from app import db
+from app.autocomplete import autocomplete_index
+
+
+def autocomplete(client, term, fields=''):
+    response = client.get(f'/api/products/search/autocomplete?q={term}&fields={fields}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_prefix_matches_any_word(client, catalog):
+    data = autocomplete(client, 'gala')
+
+    expected = sorted(product.id for product in catalog['products'] if 'galaxy' in product.name)[:4]
+    assert sorted(product['id'] for product in data['products']) == expected
+    assert data['products'][0]['category'] in ('Celulares', 'Audio')
+    assert [brand['name'] for brand in autocomplete(client, 'sam')['brands']] == ['Samsung']
+
+
+def test_index_keeps_only_identity_fields(client, catalog):
+    autocomplete(client, 'gala')
+
+    entry = autocomplete_index.products.search('gala', 1)[0]
+    assert set(entry) == {'id', 'name', 'brand'}
+
+
+def test_price_and_stock_are_read_live(client, catalog):
+    product = catalog['products'][1]
+    assert autocomplete(client, 'gala', 'stock,price')['products'][0] == {
+        'id': product.id, 'stock': 5, 'price': product.price
+    }
+
+    # Cambios que no pasan por el índice (una compra, otro worker)
+    product.stock = 1
+    product.price = 999.0
+    db.session.commit()
+
+    assert autocomplete(client, 'gala', 'stock,price')['products'][0] == {
+        'id': product.id, 'stock': 1, 'price': 999.0
+    }
+
+
+def test_inactive_products_are_not_returned(client, catalog):
+    autocomplete(client, 'gala')
+    product = catalog['products'][1]
+    product.is_active = False
+    db.session.commit()
+
+    assert product.id not in [entry['id'] for entry in autocomplete(client, 'gala')['products']]
@@ -0,0 +1,76 @@
+# test_cache.py
+# Caché de respuestas del catálogo: invalidación por versión, contadores y
+# la caché desactivada cuando la de memoria correría en varios procesos.
+
+from threading import Thread
+
+import pytest
+from flask import Flask
+from app import db
+from app.cache import ResponseCache, MemoryBackend, NullBackend, cache
+
+
+def test_write_bumps_invalidate_cached_responses(client, catalog):
+    brand = catalog['brands'][0]
+    hits = cache.hits
+
+    assert client.get('/api/products/brands').status_code == 200
+    assert client.get('/api/products/brands').status_code == 200
+    assert cache.hits == hits + 1
+
+    brand.name = 'Samsung Electronics'
+    db.session.commit()
+    # Sin bump la respuesta guardada sigue vigente
+    assert 'Samsung Electronics' not in client.get('/api/products/brands').get_data(as_text=True)
+
+    cache.bump('catalog')
+    assert 'Samsung Electronics' in client.get('/api/products/brands').get_data(as_text=True)
+
+
+def test_memory_backend_with_several_workers_disables_caching(caplog):
+    app = Flask(__name__)
+    app.config.update(CACHE_BACKEND='memory', CACHE_WORKERS=2)
+    response_cache = ResponseCache()
+    calls = []
+
+    @app.route('/items')
+    @response_cache.etag('catalog')
+    @response_cache.cached('catalog')
+    def items():
+        calls.append(1)
+        return {'calls': len(calls)}
+
+    # Arranca igual (migraciones y comandos de la CLI pasan por create_app)
+    response_cache.init_app(app)
+
+    assert isinstance(response_cache.backend, NullBackend)
+    assert 'CACHE_BACKEND=redis' in caplog.text
+
+    client = app.test_client()
+    first = client.get('/items')
+    second = client.get('/items', headers={'If-None-Match': '*'})
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert first.headers.get('ETag') is None
+    assert second.get_json() == {'calls': 2}
+
+    app.config['CACHE_WORKERS'] = 1
+    response_cache.init_app(app)
+    assert isinstance(response_cache.backend, MemoryBackend)
+
+
+def test_hit_and_miss_counters_are_thread_safe():
+    response_cache = ResponseCache()
+
+    def count():
+        for _ in range(10000):
+            response_cache._count(hit=True)
+            response_cache._count(hit=False)
+
+    threads = [Thread(target=count) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert response_cache.stats()['hits'] == 80000
+    assert response_cache.stats()['misses'] == 80000
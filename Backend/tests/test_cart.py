@@ -0,0 +1,155 @@
+# test_cart.py
+# Carrito: lecturas, add-to-cart con upsert y el endpoint batch.
+
+from app import db
+from app.models import CartItem
+from app.utils import count_queries
+from conftest import auth_headers, add_cart
+
+
+def cart_quantities(user):
+    db.session.expire_all()
+    return {item.product_id: item.quantity for item in CartItem.query.join(CartItem.cart).filter_by(user_id=user.id)}
+
+
+def batch(client, user, operations):
+    return client.post('/api/cart/batch', json={'operations': operations}, headers=auth_headers(user.id))
+
+
+def test_cart_read_is_one_query_with_totals(client, catalog):
+    user = catalog['users'][1]
+    products = catalog['products']
+    add_cart(user, [(products[0], 2), (products[1], 1)])
+    headers = auth_headers(user.id)
+
+    with count_queries() as counter:
+        small = client.get('/api/cart/', headers=headers)
+    assert counter.count == 1
+
+    data = small.get_json()
+    expected_total = products[0].price * 2 + products[1].price
+    expected_final = products[0].final_price * 2 + products[1].final_price
+    assert data['total'] == expected_total
+    assert data['final_total'] == round(expected_final, 2)
+    assert data['savings'] == round(expected_total - expected_final, 2)
+    assert (data['item_count'], data['total_quantity']) == (2, 3)
+    assert data['items'][1]['product']['brand'] == 'Sony'
+
+    other = catalog['users'][0]
+    add_cart(other, [(product, 1) for product in products])
+    headers = auth_headers(other.id)
+    for url in ('/api/cart/', '/api/cart/summary'):
+        with count_queries() as counter:
+            assert client.get(url, headers=headers).status_code == 200
+        assert counter.count == 1
+
+
+def test_cart_read_without_cart_does_not_create_one(client, catalog):
+    user = catalog['users'][1]
+
+    data = client.get('/api/cart/', headers=auth_headers(user.id)).get_json()
+
+    assert data['cart']['id'] is None
+    assert data['items'] == []
+    assert CartItem.query.count() == 0
+
+
+def test_batch_applies_all_operations(client, catalog):
+    user = catalog['users'][1]
+    first, second, third = catalog['products'][:3]
+    cart = add_cart(user, [(first, 1), (second, 1)])
+    item_ids = {item.product_id: item.id for item in cart.items}
+
+    response = batch(client, user, [
+        {'op': 'add', 'product_id': third.id, 'quantity': 2},
+        {'op': 'update', 'item_id': item_ids[first.id], 'quantity': 4},
+        {'op': 'remove', 'item_id': item_ids[second.id]},
+    ])
+
+    assert response.status_code == 200
+    assert response.get_json()['total_quantity'] == 6
+    assert cart_quantities(user) == {first.id: 4, third.id: 2}
+
+
+def test_batch_is_all_or_nothing(client, catalog):
+    user = catalog['users'][1]
+    first, second = catalog['products'][:2]
+    add_cart(user, [(first, 1)])
+
+    response = batch(client, user, [
+        {'op': 'add', 'product_id': second.id, 'quantity': 1},
+        {'op': 'add', 'product_id': first.id, 'quantity': 10},
+    ])
+
+    assert response.status_code == 400
+    assert cart_quantities(user) == {first.id: 1}
+
+
+def test_batch_ignores_untouched_lines_above_stock(client, catalog):
+    user = catalog['users'][1]
+    first, second, third = catalog['products'][:3]
+    cart = add_cart(user, [(first, 4), (second, 1)])
+    second_item = next(item.id for item in cart.items if item.product_id == second.id)
+
+    # El stock bajó después de agregar el producto al carrito
+    first.stock = 2
+    db.session.commit()
+
+    response = batch(client, user, [
+        {'op': 'remove', 'item_id': second_item},
+        {'op': 'add', 'product_id': third.id, 'quantity': 1},
+    ])
+    assert response.status_code == 200
+    assert cart_quantities(user) == {first.id: 4, third.id: 1}
+
+    # Cambiar la línea que supera el stock sí se valida
+    response = batch(client, user, [{'op': 'add', 'product_id': first.id, 'quantity': 1}])
+    assert response.status_code == 400
+
+
+def add(client, headers, product, quantity):
+    return client.post('/api/cart/add', json={'product_id': product.id, 'quantity': quantity}, headers=headers)
+
+
+def test_add_to_existing_cart_is_one_upsert(client, catalog):
+    user = catalog['users'][1]
+    first, second = catalog['products'][:2]
+    add_cart(user, [(first, 1)])
+    headers = auth_headers(user.id)
+    first_id, second_id = first.id, second.id
+
+    for product_id, quantity in ((first_id, 2), (second_id, 1)):
+        with count_queries() as counter:
+            response = client.post('/api/cart/add', json={'product_id': product_id, 'quantity': quantity}, headers=headers)
+        assert response.status_code == 200
+        assert counter.count == 1
+        assert 'ON CONFLICT' in counter.statements[0].upper()
+
+    assert cart_quantities(user) == {first_id: 3, second_id: 1}
+
+
+def test_add_to_cart_checks_accumulated_stock(client, catalog):
+    user = catalog['users'][1]
+    product = catalog['products'][0]
+    add_cart(user, [(product, 4)])
+    headers = auth_headers(user.id)
+
+    response = add(client, headers, product, 2)
+
+    assert response.status_code == 400
+    assert 'Solo hay 5' in response.get_json()['message']
+    assert cart_quantities(user) == {product.id: 4}
+    assert add(client, headers, product, 1).status_code == 200
+    assert cart_quantities(user) == {product.id: 5}
+
+
+def test_add_to_cart_creates_missing_cart(client, catalog):
+    user = catalog['users'][1]
+    product = catalog['products'][0]
+    headers = auth_headers(user.id)
+
+    assert add(client, headers, product, 6).status_code == 400
+    assert add(client, headers, product, 2).status_code == 200
+    assert add(client, headers, product, 1).status_code == 200
+    assert cart_quantities(user) == {product.id: 3}
+    assert client.post('/api/cart/add', json={'product_id': 999, 'quantity': 1}, headers=headers).status_code == 404
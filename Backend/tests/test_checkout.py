@@ -0,0 +1,212 @@
+# test_checkout.py
+# Checkout: reserva atómica de stock y creación de la orden con sus items.
+
+import importlib.util
+import os
+from threading import Barrier, Thread
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+from app import db
+from app.checkout import place_order
+from app.inventory import reserve_stock, release_stock, InsufficientStock
+from app.models import Address, Order, OrderItem, Payment, Product, User
+from app.utils import count_queries
+from conftest import BACKEND_DIR, auth_headers, add_cart
+
+SNAPSHOT_MIGRATION = os.path.join(
+    BACKEND_DIR, 'migrations', 'versions', 'e1c7a4f29b5d_add_order_item_product_snapshot.py'
+)
+
+
+def stock(product):
+    db.session.expire_all()
+    return db.session.get(Product, product.id).stock
+
+
+def place(client, user):
+    address = Address(user_id=user.id, street='Calle 1', city='Ciudad', country='AR')
+    db.session.add(address)
+    db.session.commit()
+    return client.post('/api/orders/', json={'address_id': address.id}, headers=auth_headers(user.id))
+
+
+def test_reserve_and_release_stock(catalog):
+    first, second = catalog['products'][:2]
+
+    # Las líneas repetidas del mismo producto se suman
+    reserve_stock([(first.id, 2), (second.id, 1), (first.id, 1)])
+    db.session.commit()
+    assert (stock(first), stock(second)) == (2, 4)
+
+    release_stock([(first.id, 3)])
+    db.session.commit()
+    assert stock(first) == 5
+
+
+def test_reserve_is_all_or_nothing(catalog):
+    first, second = catalog['products'][:2]
+
+    with pytest.raises(InsufficientStock) as error:
+        reserve_stock([(first.id, 1), (second.id, 6)])
+    db.session.rollback()
+
+    assert error.value.product_id == second.id
+    assert error.value.available == 5
+    assert (stock(first), stock(second)) == (5, 5)
+
+
+def test_reserve_checks_the_database_not_the_loaded_object(app, catalog):
+    product = catalog['products'][0]
+    assert product.stock == 5
+
+    # Otra transacción vende 4 unidades después de que esta leyó el producto
+    with db.engine.begin() as connection:
+        connection.execute(text('UPDATE product SET stock = 1 WHERE id = :id'), {'id': product.id})
+
+    with pytest.raises(InsufficientStock):
+        reserve_stock([(product.id, 2)])
+    db.session.rollback()
+    assert stock(product) == 1
+
+
+def test_last_unit_is_sold_once(client, catalog):
+    admin, ana = catalog['users']
+    product = catalog['products'][0]
+    product.stock = 1
+    db.session.commit()
+    add_cart(admin, [(product, 1)])
+    add_cart(ana, [(product, 1)])
+
+    assert place(client, admin).status_code == 201
+    response = place(client, ana)
+
+    assert response.status_code == 400
+    assert 'Insufficient stock' in response.get_json()['message']
+    assert stock(product) == 0
+
+
+def test_concurrent_buyers_of_the_last_unit_do_not_oversell(app, catalog):
+    buyers = 50
+    product = catalog['products'][0]
+    product.stock = 1
+    db.session.commit()
+
+    requests = []
+    for position in range(buyers):
+        user = User(username=f'comprador{position}', email=f'comprador{position}@example.com', password='x')
+        db.session.add(user)
+        db.session.flush()
+        address = Address(user_id=user.id, street='Calle 1', city='Ciudad', country='AR')
+        db.session.add(address)
+        db.session.flush()
+        add_cart(user, [(product, 1)])
+        requests.append(({'address_id': address.id}, auth_headers(user.id)))
+
+    # Cada thread tiene su propio cliente, contexto de app y conexión a la
+    # base (SQLite en archivo); la barrera los larga a todos juntos
+    start = Barrier(buyers)
+    responses = [None] * buyers
+
+    def buy(position):
+        body, headers = requests[position]
+        client = app.test_client()
+        start.wait()
+        response = client.post('/api/orders/', json=body, headers=headers)
+        responses[position] = (response.status_code, response.get_json())
+
+    threads = [Thread(target=buy, args=(position,)) for position in range(buyers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    statuses = [status for status, _ in responses]
+    assert statuses.count(201) == 1
+    rejected = [data['message'] for status, data in responses if status != 201]
+    assert len(rejected) == buyers - 1
+    assert all(status == 400 for status in statuses if status != 201)
+    assert all('Insufficient stock' in message for message in rejected)
+    assert stock(product) == 0
+    assert Order.query.count() == 1
+
+
+def test_order_items_are_inserted_in_one_statement(client, catalog):
+    user = catalog['users'][1]
+    products = catalog['products'][:5]
+    add_cart(user, [(product, 2) for product in products])
+
+    with count_queries() as counter:
+        response = place(client, user)
+
+    assert response.status_code == 201
+    inserts = [statement for statement in counter.statements if statement.startswith('INSERT INTO order_item')]
+    assert len(inserts) == 1
+
+    order = response.get_json()['order']
+    assert [item['product_id'] for item in order['items']] == [product.id for product in products]
+    assert order['total_amount'] == round(sum(round(product.final_price, 2) * 2 for product in products), 2)
+    item = order['items'][1]
+    assert item['product']['name'] == products[1].name
+    assert item['product']['brand'] == 'Sony'
+    assert item['unit_final_price'] == round(products[1].final_price, 2)
+    assert all(stock(product) == 3 for product in products)
+
+
+def line_total(items):
+    return round(sum(item.quantity * item.unit_final_price for item in items), 2)
+
+
+def test_order_lines_add_up_to_the_charged_total(catalog):
+    user = catalog['users'][1]
+    products = catalog['products'][:3]
+    add_cart(user, [(products[0], 1), (products[1], 2), (products[2], 3)])
+    address = Address(user_id=user.id, street='Calle 1', city='Ciudad', country='AR')
+    db.session.add(address)
+    db.session.commit()
+
+    order_data = place_order(user.id, address.id, payment={'payment_method': 'stripe', 'status': 'completed'})
+
+    order = db.session.get(Order, order_data['id'])
+    payment = Payment.query.filter_by(order_id=order.id).one()
+    # Descuentos de 0, 10 y 20%: se cobra el precio final de cada uno
+    assert order.total_amount == 100 * 1 + 99 * 2 + 96 * 3
+    assert line_total(order.items) == order.total_amount == payment.amount
+    assert [item.unit_final_price for item in order.items] == [100, 99, 96]
+    assert [item.price for item in order.items] == [100, 110, 120]
+
+
+def test_snapshot_backfill_matches_the_legacy_totals(catalog):
+    user = catalog['users'][1]
+    products = catalog['products'][:2]
+    address = Address(user_id=user.id, street='Calle 1', city='Ciudad', country='AR')
+    db.session.add(address)
+    db.session.flush()
+
+    # Orden anterior a la copia del producto: total con el precio de lista
+    order = Order(user_id=user.id, address_id=address.id, total_amount=products[0].price * 2 + products[1].price)
+    db.session.add(order)
+    db.session.flush()
+    db.session.add_all([
+        OrderItem(order_id=order.id, product_id=products[0].id, quantity=2, price=products[0].price),
+        OrderItem(order_id=order.id, product_id=products[1].id, quantity=1, price=products[1].price),
+    ])
+    db.session.commit()
+
+    spec = importlib.util.spec_from_file_location('snapshot_migration', SNAPSHOT_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with db.engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.backfill_snapshots()
+
+    db.session.expire_all()
+    items = sorted(db.session.get(Order, order.id).items, key=lambda item: item.product_id)
+    assert [(item.product_name, item.brand_name, item.category_name) for item in items] == [
+        (products[0].name, 'Samsung', 'Celulares'),
+        (products[1].name, 'Sony', 'Audio'),
+    ]
+    assert [item.unit_final_price for item in items] == [item.price for item in items]
+    assert line_total(items) == db.session.get(Order, order.id).total_amount
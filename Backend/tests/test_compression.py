@@ -0,0 +1,91 @@
+# test_compression.py
+# Compresión de respuestas: negociación por Accept-Encoding, Vary y ETags por codificación.
+
+import gzip
+import json
+
+import pytest
+from flask import Response
+
+from app.compression import compress_response, brotli
+
+needs_brotli = pytest.mark.skipif(brotli is None, reason='brotli no está instalado')
+
+PRODUCTS_URL = '/api/products/?per_page=6'
+
+
+def get(client, url, encoding=None, **headers):
+    if encoding is not None:
+        headers['Accept-Encoding'] = encoding
+    return client.get(url, headers=headers)
+
+
+def decode(response):
+    data = response.get_data()
+    if response.headers.get('Content-Encoding') == 'br':
+        return json.loads(brotli.decompress(data))
+    if response.headers.get('Content-Encoding') == 'gzip':
+        return json.loads(gzip.decompress(data))
+    return json.loads(data)
+
+
+@needs_brotli
+def test_brotli_is_preferred_and_gzip_is_the_fallback(client, catalog):
+    plain = get(client, PRODUCTS_URL)
+    br = get(client, PRODUCTS_URL, 'gzip, deflate, br')
+    gz = get(client, PRODUCTS_URL, 'gzip, deflate')
+
+    assert plain.headers.get('Content-Encoding') is None
+    assert br.headers['Content-Encoding'] == 'br'
+    assert gz.headers['Content-Encoding'] == 'gzip'
+    assert decode(br) == decode(gz) == decode(plain)
+    assert len(br.get_data()) < len(plain.get_data())
+    for response in (plain, br, gz):
+        assert 'Accept-Encoding' in response.vary
+
+
+def test_small_and_unaccepted_responses_are_not_compressed(app, client, catalog):
+    small = get(client, '/api/auth/ping', 'gzip')
+    assert len(small.get_data()) < app.config['COMPRESS_MIN_SIZE']
+    assert small.headers.get('Content-Encoding') is None
+    assert 'Accept-Encoding' in small.vary
+
+    refused = get(client, PRODUCTS_URL, 'identity')
+    assert refused.headers.get('Content-Encoding') is None
+    assert 'Accept-Encoding' in refused.vary
+
+
+def test_etag_gets_encoding_suffix_and_revalidates(client, catalog):
+    plain = get(client, PRODUCTS_URL)
+    gz = get(client, PRODUCTS_URL, 'gzip')
+
+    etag = plain.get_etag()[0]
+    assert gz.get_etag() == (etag + '-gzip', False)
+
+    for response, encoding in ((plain, None), (gz, 'gzip')):
+        revalidated = get(client, PRODUCTS_URL, encoding, **{'If-None-Match': response.headers['ETag']})
+        assert revalidated.status_code == 304
+        assert revalidated.headers['ETag'] == response.headers['ETag']
+        assert 'Accept-Encoding' in revalidated.vary
+
+
+@needs_brotli
+def test_brotli_etag_revalidates(client, catalog):
+    br = get(client, PRODUCTS_URL, 'br')
+    assert br.get_etag()[0].endswith('-br')
+
+    revalidated = get(client, PRODUCTS_URL, 'br', **{'If-None-Match': br.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+def test_streamed_responses_are_compressed_in_chunks(app):
+    chunks = [json.dumps({'position': position, 'text': 'x' * 100}) + '\n' for position in range(50)]
+    response = Response(iter(chunks), mimetype='text/plain')
+
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = compress_response(response, app.config)
+
+    assert response.is_streamed
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(b''.join(response.response)).decode() == ''.join(chunks)
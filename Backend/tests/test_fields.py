@@ -0,0 +1,55 @@
+# test_fields.py
+# Sparse fieldsets (?fields=) en productos y reviews, en modo offset y cursor.
+
+import pytest
+from app.models import Product
+from app.utils import keyset_paginate
+from conftest import add_reviews
+
+
+@pytest.mark.parametrize('fields', ['id', 'rating', 'name', 'id,name', 'final_price,brand'])
+@pytest.mark.parametrize('cursor', [None, ''])
+def test_product_fields_in_offset_and_cursor_mode(client, catalog, fields, cursor):
+    url = f'/api/products/?per_page=4&sort_by=price&sort_order=asc&fields={fields}'
+    if cursor is not None:
+        url += f'&cursor={cursor}'
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    products = response.get_json()['products']
+    expected = {'id', *fields.split(',')}
+    assert [set(product) for product in products] == [expected] * 4
+    assert [product['id'] for product in products] == [product.id for product in catalog['products'][:4]]
+
+
+def test_single_field_cursor_pages_chain(client, catalog):
+    first = client.get('/api/products/?per_page=4&sort_by=price&sort_order=asc&fields=id&cursor=').get_json()
+    second = client.get(
+        f'/api/products/?per_page=4&sort_by=price&sort_order=asc&fields=id&cursor={first["next_cursor"]}'
+    ).get_json()
+
+    ids = [product['id'] for product in first['products'] + second['products']]
+    assert ids == [product.id for product in catalog['products']]
+    assert second['has_next'] is False
+
+
+def test_keyset_paginate_returns_tuples_for_single_column_queries(catalog):
+    sort_keys = [(Product.id, False)]
+
+    columns = keyset_paginate(Product.query.with_entities(Product.id), sort_keys, per_page=2)
+    entities = keyset_paginate(Product.query, sort_keys, per_page=2)
+
+    assert columns['items'] == [(catalog['products'][0].id,), (catalog['products'][1].id,)]
+    assert entities['items'] == catalog['products'][:2]
+
+
+def test_review_fields(client, catalog):
+    product = catalog['products'][0]
+    add_reviews(product, [4, 5], catalog['users'])
+
+    response = client.get(f'/api/products/{product.id}/reviews?fields=rating')
+
+    assert response.status_code == 200
+    assert sorted(review['rating'] for review in response.get_json()['reviews']) == [4, 5]
+    assert client.get(f'/api/products/{product.id}/reviews?fields=bogus').status_code == 400
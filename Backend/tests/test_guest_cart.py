@@ -0,0 +1,114 @@
+# test_guest_cart.py
+# Carrito de invitado: token firmado, sin escrituras, y merge idempotente
+# al iniciar sesión.
+
+import pytest
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import Cart, CartItem
+from app.utils import count_queries
+from conftest import auth_headers, add_cart
+
+
+@pytest.fixture
+def shopper(catalog):
+    user = catalog['users'][1]
+    user.password = generate_password_hash('secreto123')
+    db.session.commit()
+    return user
+
+
+def guest_token(client, operations):
+    response = client.post('/api/cart/guest', json={'operations': operations})
+    assert response.status_code == 200
+    return response.get_json()['token']
+
+
+def cart_quantities(user):
+    db.session.expire_all()
+    return {item.product_id: item.quantity for item in CartItem.query.join(CartItem.cart).filter_by(user_id=user.id)}
+
+
+def test_guest_cart_does_not_write(client, catalog):
+    product = catalog['products'][0]
+
+    with count_queries() as counter:
+        token = guest_token(client, [{'op': 'add', 'product_id': product.id, 'quantity': 2}])
+
+    assert all(statement.lstrip().upper().startswith('SELECT') for statement in counter.statements)
+    data = client.get(f'/api/cart/guest?token={token}').get_json()
+    assert [(item['product_id'], item['quantity']) for item in data['items']] == [(product.id, 2)]
+    assert Cart.query.count() == 0
+
+
+@pytest.mark.parametrize('login', [
+    lambda client, user, token: client.post('/api/auth/login', json={
+        'username': user.username, 'password': 'secreto123', 'guest_cart': token
+    }),
+    lambda client, user, token: client.post('/api/users/login', json={
+        'email': user.email, 'password': 'secreto123', 'guest_cart': token
+    }),
+], ids=['auth-login', 'users-login'])
+def test_login_merges_guest_cart(client, catalog, shopper, login):
+    first, second = catalog['products'][:2]
+    add_cart(shopper, [(first, 1)])
+    token = guest_token(client, [
+        {'op': 'add', 'product_id': first.id, 'quantity': 3},
+        {'op': 'add', 'product_id': second.id, 'quantity': 2},
+    ])
+
+    response = login(client, shopper, token)
+
+    assert response.status_code == 200
+    assert response.get_json()['cart_merged'] is True
+    assert cart_quantities(shopper) == {first.id: 3, second.id: 2}
+
+
+def test_merge_replay_does_not_add_again(client, catalog, shopper):
+    first, second = catalog['products'][:2]
+    add_cart(shopper, [(second, 4)])
+    token = guest_token(client, [
+        {'op': 'add', 'product_id': first.id, 'quantity': 2},
+        {'op': 'add', 'product_id': second.id, 'quantity': 1},
+    ])
+
+    response = client.post('/api/auth/login', json={
+        'username': shopper.username, 'password': 'secreto123', 'guest_cart': token
+    })
+    assert response.get_json()['cart_merged'] is True
+    for _ in range(2):
+        response = client.post('/api/cart/merge', json={'token': token}, headers=auth_headers(shopper.id))
+        assert response.status_code == 200
+
+    # La línea existente conserva su cantidad mayor; la nueva no se duplica
+    assert cart_quantities(shopper) == {first.id: 2, second.id: 4}
+
+
+def test_merge_clamps_to_stock_and_bad_token_keeps_login(client, catalog, shopper):
+    product = catalog['products'][0]
+    token = guest_token(client, [{'op': 'add', 'product_id': product.id, 'quantity': 5}])
+    product.stock = 3
+    db.session.commit()
+
+    client.post('/api/cart/merge', json={'token': token}, headers=auth_headers(shopper.id))
+    assert cart_quantities(shopper) == {product.id: 3}
+
+    response = client.post('/api/auth/login', json={
+        'username': shopper.username, 'password': 'secreto123', 'guest_cart': token + 'x'
+    })
+    assert response.status_code == 200
+    assert response.get_json()['cart_merged'] is False
+
+
+def test_guest_operations_ignore_untouched_lines_above_stock(client, catalog):
+    first, second = catalog['products'][:2]
+    token = guest_token(client, [{'op': 'add', 'product_id': first.id, 'quantity': 5}])
+    first.stock = 2
+    db.session.commit()
+
+    response = client.post('/api/cart/guest', json={
+        'token': token, 'operations': [{'op': 'add', 'product_id': second.id, 'quantity': 1}]
+    })
+
+    assert response.status_code == 200
+    assert {item['product_id']: item['quantity'] for item in response.get_json()['items']} == {first.id: 5, second.id: 1}
@@ -0,0 +1,47 @@
+# test_indexes.py
+# Índices de los caminos de consulta (migración c5e8a2d7f613): existen en el
+# esquema de los modelos y SQLite los usa en las consultas para las que se
+# crearon.
+
+import importlib.util
+import os
+
+import pytest
+from sqlalchemy import inspect, text
+from app import db
+
+MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'migrations', 'versions', 'c5e8a2d7f613_add_query_path_indexes.py'
+)
+
+
+def migration_indexes():
+    spec = importlib.util.spec_from_file_location('query_path_indexes', MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.INDEXES
+
+
+def test_models_declare_the_migration_indexes():
+    inspector = inspect(db.engine)
+    for name, table, columns, _ in migration_indexes():
+        indexes = {index['name']: index['column_names'] for index in inspector.get_indexes(table)}
+        unique = {constraint['name']: constraint['column_names'] for constraint in inspector.get_unique_constraints(table)}
+        # cart_item (cart_id, product_id) pasó a ser una restricción única (d9b3f6e1a8c4)
+        assert indexes.get(name, unique.get('uq_cart_item_cart_id_product_id')) == columns, name
+
+
+@pytest.mark.parametrize('sql, index', [
+    ('SELECT id FROM product WHERE is_active = 1 AND category_id = 1', 'ix_product_active_category_id'),
+    ('SELECT id FROM product WHERE is_active = 1 ORDER BY price, id LIMIT 10', 'ix_product_active_price'),
+    ('SELECT rating FROM review WHERE product_id = 1', 'ix_review_product_id_rating'),
+    ('SELECT id FROM "order" WHERE user_id = 1 ORDER BY creation_date DESC LIMIT 10', 'ix_order_user_id_creation_date'),
+    ('SELECT id FROM cart WHERE user_id = 1 AND is_active = 1', 'ix_cart_user_id_is_active'),
+    ('SELECT id FROM order_item WHERE order_id IN (1, 2, 3)', 'ix_order_item_order_id'),
+    ("SELECT id FROM payment WHERE status = 'paid' ORDER BY creation_date DESC LIMIT 10",
+     'ix_payment_status_creation_date'),
+])
+def test_sqlite_plan_uses_index(sql, index):
+    plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+    assert index in plan
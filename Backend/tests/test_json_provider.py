@@ -0,0 +1,89 @@
+# test_json_provider.py
+# FastJSONProvider: con orjson y con la librería estándar la API devuelve lo mismo.
+
+import json
+from datetime import datetime, date, timezone
+from decimal import Decimal
+
+import pytest
+from flask import jsonify
+
+from app.json_provider import FastJSONProvider, init_json, orjson
+
+needs_orjson = pytest.mark.skipif(orjson is None, reason='orjson no está instalado')
+
+PAYLOAD = {
+    'name': 'Auriculares Sony WH-1000XM5 – edición año 2024 ñ',
+    'price': 349.99,
+    'stock': 0,
+    'active': True,
+    'discount': None,
+    'created': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    'released': date(2024, 1, 2),
+    'amount': Decimal('10.50'),
+    'tags': ['audio', 'bluetooth'],
+    'by_star': {5: 3, 1: 1},
+    'nested': {'b': 1, 'a': [{'z': 1, 'y': 2}]},
+}
+
+
+def providers(app):
+    fast = FastJSONProvider(app)
+    stdlib = FastJSONProvider(app)
+    stdlib.use_orjson = False
+    return fast, stdlib
+
+
+def response_body(app, provider, obj):
+    with app.test_request_context():
+        response = provider.response(obj)
+    return response.get_data()
+
+
+@needs_orjson
+def test_orjson_and_stdlib_outputs_parse_equal(app):
+    fast, stdlib = providers(app)
+
+    fast_body = response_body(app, fast, PAYLOAD)
+    stdlib_body = response_body(app, stdlib, PAYLOAD)
+
+    assert json.loads(fast_body) == json.loads(stdlib_body)
+    assert json.loads(fast.dumps(PAYLOAD)) == json.loads(stdlib.dumps(PAYLOAD))
+
+    data = json.loads(fast_body)
+    assert data['created'] == 'Tue, 02 Jan 2024 03:04:05 GMT'
+    assert data['by_star'] == {'5': 3, '1': 1}
+    assert data['amount'] == '10.50'
+    # UTF-8 sin escapar y claves ordenadas, como pide sort_keys
+    assert PAYLOAD['name'].encode() in fast_body
+    assert list(data) == sorted(PAYLOAD)
+    assert list(data['nested']['a'][0]) == ['y', 'z']
+
+
+@needs_orjson
+def test_orjson_falls_back_for_wide_integers(app):
+    fast, stdlib = providers(app)
+    obj = {'id': 2 ** 70, 'small': 1}
+
+    assert json.loads(response_body(app, fast, obj)) == obj
+    assert fast.dumps(obj) == stdlib.dumps(obj)
+
+
+def test_stdlib_engine_setting(app):
+    engine = app.config['JSON_ENGINE']
+    app.config['JSON_ENGINE'] = 'stdlib'
+    try:
+        init_json(app)
+        assert app.json.use_orjson is False
+        with app.test_request_context():
+            assert json.loads(jsonify(PAYLOAD).get_data())['by_star'] == {'1': 1, '5': 3}
+    finally:
+        app.config['JSON_ENGINE'] = engine
+        init_json(app)
+
+
+def test_loads_matches_stdlib(app):
+    fast, stdlib = providers(app)
+    text = '{"a": [1, 2.5, null, true], "ñ": "año"}'
+
+    assert fast.loads(text) == stdlib.loads(text) == json.loads(text)
@@ -0,0 +1,78 @@
+# test_loading.py
+# Perfiles de carga: serialize() no dispara consultas perezosas por fila.
+
+from app import db
+from app.cache import cache
+from app.loading import product_options, cart_item_options, order_detail_options
+from app.models import Product, Category, CartItem, Order
+from app.utils import count_queries
+from conftest import auth_headers, add_cart, add_orders
+
+
+def test_product_options_serialize_without_lazy_loads(catalog):
+    db.session.expire_all()
+    products = Product.query.options(*product_options()).all()
+
+    with count_queries() as counter:
+        data = [product.serialize() for product in products]
+
+    assert counter.count == 0
+    assert {product['brand'] for product in data} == {'Samsung', 'Sony'}
+
+
+def test_cart_item_options_serialize_without_lazy_loads(catalog):
+    add_cart(catalog['users'][1], [(product, 1) for product in catalog['products'][:4]])
+    db.session.expire_all()
+
+    with count_queries() as counter:
+        items = CartItem.query.options(*cart_item_options()).all()
+        data = [item.serialize() for item in items]
+
+    assert counter.count == 1
+    assert len(data) == 4
+
+
+def test_categories_endpoint_query_count_is_constant(client, catalog):
+    with count_queries() as counter:
+        assert client.get('/api/products/categories').status_code == 200
+    before = counter.count
+
+    parent = catalog['categories'][0]
+    db.session.add_all([Category(name=f'Sub {position}', parent_id=parent.id) for position in range(5)])
+    db.session.commit()
+    cache.bump('catalog')
+
+    with count_queries() as counter:
+        response = client.get('/api/products/categories')
+    assert response.status_code == 200
+    assert len(response.get_json()) == 7
+    assert counter.count == before
+
+
+def test_order_detail_options_load_items_in_one_batch(catalog):
+    add_orders(catalog['users'][1], catalog['products'], count=4)
+    db.session.expire_all()
+
+    with count_queries() as counter:
+        orders = Order.query.options(*order_detail_options()).all()
+        data = [[item.serialize_snapshot() for item in order.items] for order in orders]
+
+    assert counter.count == 2
+    assert [len(items) for items in data] == [2, 2, 2, 2]
+
+
+def test_order_history_query_count_does_not_grow_with_page_size(client, catalog):
+    user = catalog['users'][1]
+    add_orders(user, catalog['products'], count=6)
+    headers = auth_headers(user.id)
+
+    counts = []
+    for per_page in (1, 6):
+        with count_queries() as counter:
+            response = client.get(f'/api/orders/?per_page={per_page}', headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()['orders']) == per_page
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1]
+    assert all(len(order['items']) > 0 for order in response.get_json()['orders'])
@@ -0,0 +1,77 @@
+# test_pagination.py
+# Paginación por cursor (keyset): recorre el mismo orden que OFFSET sin
+# saltear ni repetir filas.
+
+import pytest
+from app import db
+from app.ratings import rebuild_rating_summaries
+from app.utils import count_queries
+from conftest import add_reviews
+
+
+def walk(client, url, per_page=2):
+    """IDs de todas las páginas siguiendo next_cursor"""
+    ids = []
+    cursor = ''
+    while True:
+        response = client.get(f'{url}&per_page={per_page}&cursor={cursor}')
+        assert response.status_code == 200
+        data = response.get_json()
+        ids.extend(product['id'] for product in data['products'])
+        if not data['has_next']:
+            return ids
+        cursor = data['next_cursor']
+
+
+@pytest.fixture
+def rated(catalog):
+    """Cuatro productos con reviews (dos empatados) y dos sin reviews"""
+    products, users = catalog['products'], catalog['users']
+    add_reviews(products[0], [4], users)
+    add_reviews(products[1], [5, 3], users)
+    add_reviews(products[2], [2], users)
+    add_reviews(products[4], [5], users)
+    rebuild_rating_summaries()
+    db.session.commit()
+    return products
+
+
+@pytest.mark.parametrize('sort_order', ['desc', 'asc'])
+def test_rating_cursor_matches_offset_order(client, rated, sort_order):
+    url = f'/api/products/?sort_by=rating&sort_order={sort_order}'
+    offset_ids = [product['id'] for product in client.get(f'{url}&per_page=50').get_json()['products']]
+
+    # per_page=1 deja un cursor sobre un rating NULL
+    for per_page in (1, 2, 4):
+        assert walk(client, url, per_page) == offset_ids
+    assert len(set(offset_ids)) == 6
+    # Los productos sin reviews quedan al final en ambos sentidos
+    assert set(offset_ids[-2:]) == {rated[3].id, rated[5].id}
+
+
+def test_rating_sort_uses_bare_column(client, rated):
+    with count_queries() as counter:
+        client.get('/api/products/?sort_by=rating&per_page=3&cursor=')
+
+    page_query = next(statement for statement in counter.statements if 'ORDER BY' in statement)
+    order_by = page_query.split('ORDER BY')[1]
+    assert 'avg_rating DESC NULLS LAST' in order_by
+    assert 'coalesce' not in order_by.lower()
+
+
+@pytest.mark.parametrize('replay', [
+    'sort_by=price&sort_order=asc',
+    'sort_by=name&sort_order=desc',
+    'sort_by=rating&sort_order=asc',
+])
+def test_cursor_from_another_sort_is_rejected(client, catalog, replay):
+    first = client.get('/api/products/?sort_by=name&sort_order=asc&per_page=2&cursor=').get_json()
+    cursor = first['next_cursor']
+
+    response = client.get(f'/api/products/?{replay}&per_page=2&cursor={cursor}')
+
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Cursor inválido'
+    # Con el mismo orden el cursor sigue sirviendo
+    same = client.get(f'/api/products/?sort_by=name&sort_order=asc&per_page=2&cursor={cursor}')
+    assert same.status_code == 200
@@ -0,0 +1,67 @@
+# test_prune_carts.py
+# flask prune-empty-carts: borra por lotes los carritos viejos sin items y
+# deja los recientes, los que tienen items y los que ya pasaron por checkout.
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.cart import prune_empty_carts
+from app.models import Address, Cart
+from conftest import auth_headers, add_cart
+
+OLD = datetime.utcnow() - timedelta(days=60)
+
+
+def old_empty_carts(user, count):
+    carts = [Cart(user_id=user.id, is_active=False, creation_date=OLD) for _ in range(count)]
+    db.session.add_all(carts)
+    db.session.commit()
+    return [cart.id for cart in carts]
+
+
+def backdate(cart_id):
+    db.session.get(Cart, cart_id).creation_date = OLD
+    db.session.commit()
+
+
+def remaining_cart_ids():
+    db.session.expire_all()
+    return sorted(cart_id for cart_id, in db.session.query(Cart.id))
+
+
+def test_command_deletes_every_old_empty_cart_in_small_batches(app, client, catalog):
+    admin, ana = catalog['users']
+    product = catalog['products'][0]
+    old_empty_carts(ana, 5)
+
+    recent = Cart(user_id=ana.id, is_active=True)
+    db.session.add(recent)
+    db.session.commit()
+    with_items = add_cart(ana, [(product, 1)]).id
+    backdate(with_items)
+
+    # Carrito convertido en orden: queda inactivo y conserva sus items
+    ordered = add_cart(admin, [(product, 1)]).id
+    address = Address(user_id=admin.id, street='Calle 1', city='Ciudad', country='AR')
+    db.session.add(address)
+    db.session.commit()
+    response = client.post('/api/orders/', json={'address_id': address.id}, headers=auth_headers(admin.id))
+    assert response.status_code == 201
+    backdate(ordered)
+
+    result = app.test_cli_runner().invoke(args=['prune-empty-carts', '--days', '30', '--batch-size', '2'])
+
+    assert result.exit_code == 0
+    assert '5 carritos vacíos eliminados' in result.output
+    assert remaining_cart_ids() == sorted([recent.id, with_items, ordered])
+
+
+def test_each_batch_deletes_at_most_batch_size(catalog):
+    cart_ids = old_empty_carts(catalog['users'][1], 3)
+    cutoff = datetime.utcnow() - timedelta(days=30)
+
+    assert prune_empty_carts(cutoff, batch_size=2) == 2
+    assert prune_empty_carts(cutoff, batch_size=2) == 1
+    assert prune_empty_carts(cutoff, batch_size=2) == 0
+    db.session.commit()
+    assert not set(cart_ids) & set(remaining_cart_ids())
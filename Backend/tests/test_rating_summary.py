@@ -0,0 +1,91 @@
+# test_rating_summary.py
+# Resumen desnormalizado product_rating_summary: se actualiza con deltas en
+# cada escritura de reviews y coincide con recalcularlo desde cero.
+
+from app import db
+from app.models import ProductRatingSummary
+from app.ratings import get_review_stats, rebuild_rating_summaries
+from app.utils import count_queries
+from conftest import auth_headers, add_reviews
+
+
+def summary_row(product_id):
+    db.session.expire_all()
+    summary = db.session.get(ProductRatingSummary, product_id)
+    return (summary.review_count, summary.rating_sum, summary.avg_rating,
+            [getattr(summary, f'rating_{star}') for star in range(1, 6)])
+
+
+def rebuilt_row(product_id):
+    rebuild_rating_summaries([product_id])
+    row = summary_row(product_id)
+    db.session.rollback()
+    return row
+
+
+def create_review(client, user, product, rating):
+    response = client.post(
+        f'/api/products/{product.id}/reviews',
+        json={'rating': rating, 'title': 'Título', 'comment': 'Comentario'},
+        headers=auth_headers(user.id)
+    )
+    assert response.status_code == 201
+    return response.get_json()['review']['id']
+
+
+def test_create_update_delete_apply_deltas(client, catalog):
+    admin, ana = catalog['users']
+    product = catalog['products'][0]
+
+    first = create_review(client, admin, product, 5)
+    create_review(client, ana, product, 2)
+    assert summary_row(product.id) == (2, 7, 3.5, [0, 1, 0, 0, 1])
+
+    response = client.put(f'/api/products/reviews/{first}', json={'rating': 3}, headers=auth_headers(admin.id))
+    assert response.status_code == 200
+    assert summary_row(product.id) == (2, 5, 2.5, [0, 1, 1, 0, 0])
+    assert summary_row(product.id) == rebuilt_row(product.id)
+
+    response = client.delete(f'/api/products/reviews/{first}', headers=auth_headers(admin.id))
+    assert response.status_code == 200
+    assert summary_row(product.id) == (1, 2, 2.0, [0, 1, 0, 0, 0])
+    assert summary_row(product.id) == rebuilt_row(product.id)
+
+
+def test_update_rebuilds_missing_summary_with_new_rating(client, catalog):
+    admin = catalog['users'][0]
+    product = catalog['products'][0]
+    review_id = create_review(client, admin, product, 5)
+
+    # Sin fila de resumen (por ejemplo, reviews anteriores a la migración)
+    ProductRatingSummary.query.filter_by(product_id=product.id).delete()
+    db.session.commit()
+
+    response = client.put(f'/api/products/reviews/{review_id}', json={'rating': 1}, headers=auth_headers(admin.id))
+
+    assert response.status_code == 200
+    assert summary_row(product.id) == (1, 1, 1.0, [1, 0, 0, 0, 0])
+    assert get_review_stats(product.id)['rating_distribution']['1_star'] == 1
+
+
+def test_review_stats_distribution_comes_from_summary(client, catalog):
+    users = catalog['users']
+    few, many = catalog['products'][:2]
+    add_reviews(few, [5], users)
+    add_reviews(many, [5, 5, 4, 1, 3, 5, 2, 4], users)
+    rebuild_rating_summaries()
+    db.session.commit()
+
+    counts = []
+    for product in (few, many):
+        with count_queries() as counter:
+            response = client.get(f'/api/products/{product.id}/reviews?per_page=1')
+        assert response.status_code == 200
+        counts.append(counter.count)
+
+    stats = response.get_json()['stats']
+    assert stats['total_reviews'] == 8
+    assert stats['average_rating'] == 3.625
+    assert stats['rating_distribution'] == {'5_star': 3, '4_star': 2, '3_star': 1, '2_star': 1, '1_star': 1}
+    # La distribución no depende de cuántas reviews tenga el producto
+    assert counts[0] == counts[1]
@@ -0,0 +1,40 @@
+# test_ratings.py
+# Ratings del listado de productos: una consulta agrupada por página.
+
+from app import db
+from app.ratings import rebuild_rating_summaries
+from app.utils import count_queries
+from conftest import add_reviews
+
+
+def test_listing_includes_ratings(client, catalog):
+    first, second = catalog['products'][:2]
+    add_reviews(first, [5, 4, 3], catalog['users'])
+    add_reviews(second, [2], catalog['users'])
+    rebuild_rating_summaries()
+    db.session.commit()
+
+    response = client.get('/api/products/?sort_by=name&sort_order=asc&per_page=10')
+
+    assert response.status_code == 200
+    ratings = {product['id']: product['rating'] for product in response.get_json()['products']}
+    assert ratings[first.id] == {'average': 4.0, 'count': 3}
+    assert ratings[second.id] == {'average': 2.0, 'count': 1}
+    assert ratings[catalog['products'][2].id] == {'average': 0.0, 'count': 0}
+
+
+def test_listing_query_count_does_not_grow_with_page_size(client, catalog):
+    for product in catalog['products']:
+        add_reviews(product, [4, 5], catalog['users'])
+    rebuild_rating_summaries()
+    db.session.commit()
+
+    counts = []
+    for per_page in (2, 6):
+        with count_queries() as counter:
+            response = client.get(f'/api/products/?per_page={per_page}')
+        assert response.status_code == 200
+        assert len(response.get_json()['products']) == per_page
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1]
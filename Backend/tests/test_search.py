@@ -0,0 +1,55 @@
+# test_search.py
+# Búsqueda de texto completo (FTS5 en SQLite).
+
+from sqlalchemy import text
+from app import db, search
+from app.search import reindex_products, create_search_index
+
+
+def search_ids(client, term):
+    response = client.get(f'/api/products/?search={term}&per_page=50')
+    assert response.status_code == 200
+    return sorted(product['id'] for product in response.get_json()['products'])
+
+
+def galaxy_ids(catalog):
+    return sorted(product.id for product in catalog['products'] if 'galaxy' in product.name)
+
+
+def test_search_results_are_stable_across_requests(client, catalog):
+    reindex_products()
+    db.session.commit()
+
+    expected = galaxy_ids(catalog)
+    assert search_ids(client, 'galaxy') == expected
+    assert search_ids(client, 'gala') == expected
+    assert search_ids(client, 'galaxy') == expected
+
+
+def test_search_without_fts_table_falls_back_and_does_not_create_it(client, catalog):
+    db.session.execute(text('DROP TABLE product_search'))
+    db.session.commit()
+    search._fts5_ready.clear()
+
+    expected = galaxy_ids(catalog)
+    assert search_ids(client, 'galaxy') == expected
+    assert search_ids(client, 'galaxy') == expected
+    assert db.session.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE name = 'product_search'"
+    )).first() is None
+
+    # El comando de mantenimiento crea la tabla y la llena
+    create_search_index()
+    db.session.commit()
+    assert db.session.execute(text('SELECT count(*) FROM product_search')).scalar() == len(catalog['products'])
+    assert search_ids(client, 'galaxy') == expected
+
+
+def test_rows_inserted_outside_the_api_need_rebuild_search_index(app, client, catalog):
+    # El catálogo se cargó directo en la base: el índice no lo conoce
+    assert search_ids(client, 'galaxy') == []
+
+    result = app.test_cli_runner().invoke(args=['rebuild-search-index'])
+
+    assert result.exit_code == 0
+    assert search_ids(client, 'galaxy') == galaxy_ids(catalog)
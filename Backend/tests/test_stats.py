@@ -0,0 +1,57 @@
+# test_stats.py
+# /api/products/stats: agregados en una cantidad fija de consultas.
+
+from app import db
+from app.cache import cache
+from app.models import Product
+from app.ratings import rebuild_rating_summaries
+from app.utils import count_queries
+from conftest import add_reviews
+
+
+def test_stats_values(client, catalog):
+    products = catalog['products']
+    products[0].stock = 0
+    products[5].is_active = False
+    add_reviews(products[1], [5, 3], catalog['users'])
+    rebuild_rating_summaries()
+    db.session.commit()
+
+    stats = client.get('/api/products/stats').get_json()
+
+    active = products[:5]
+    assert stats['total_products'] == 5
+    assert stats['price_range'] == {
+        'min': 100.0, 'max': 140.0, 'average': sum(product.price for product in active) / 5
+    }
+    assert stats['categories'] == [
+        {'name': 'Celulares', 'product_count': 3}, {'name': 'Audio', 'product_count': 2}
+    ]
+    assert stats['brands'] == [
+        {'name': 'Samsung', 'product_count': 3}, {'name': 'Sony', 'product_count': 2}
+    ]
+    assert stats['stock_status'] == {'in_stock': 4, 'out_of_stock': 1}
+    assert stats['discount_status'] == {'with_discount': 3, 'without_discount': 2}
+    assert stats['rating_stats'] == {'average_rating': 4.0, 'total_reviews': 2}
+
+
+def test_stats_query_count_does_not_depend_on_catalog_size(client, catalog):
+    with count_queries() as counter:
+        assert client.get('/api/products/stats').status_code == 200
+    small = counter.count
+
+    category = catalog['categories'][0]
+    brand = catalog['brands'][0]
+    db.session.add_all([
+        Product(name=f'Extra {position}', price=10, stock=1, category_id=category.id, brand_id=brand.id, is_active=True)
+        for position in range(40)
+    ])
+    db.session.commit()
+    cache.bump('catalog')
+
+    with count_queries() as counter:
+        response = client.get('/api/products/stats')
+    assert response.get_json()['total_products'] == 46
+    assert counter.count == small
+    # Totales + conteos por categoría y marca (UNION ALL) en SQLite
+    assert small == 2
@@ -0,0 +1,80 @@
+# test_top_discounts.py
+# /api/products/top-discounts-by-category: el producto con mayor descuento de
+# cada categoría en una sola consulta, cacheado hasta el próximo bump.
+
+from app import db
+from app.cache import cache
+from app.utils import count_queries
+from conftest import auth_headers
+
+URL = '/api/products/top-discounts-by-category'
+
+
+def winners(client):
+    response = client.get(URL)
+    assert response.status_code == 200
+    return [(entry['category']['id'], entry['product']['id']) for entry in response.get_json()]
+
+
+def test_one_winner_per_category_in_one_query(client, catalog):
+    categories, products = catalog['categories'], catalog['products']
+
+    with count_queries() as counter:
+        response = client.get(URL)
+
+    assert counter.count == 1
+    data = response.get_json()
+    # Descuentos 10 * (posición % 3): gana el de 20% en cada categoría
+    assert [(entry['category']['id'], entry['product']['id']) for entry in data] == [
+        (categories[0].id, products[2].id),
+        (categories[1].id, products[5].id),
+    ]
+    assert data[0]['category'] == categories[0].serialize()
+    assert data[0]['product'] == products[2].serialize()
+
+
+def test_ties_go_to_the_lowest_id(client, catalog):
+    categories, products = catalog['categories'], catalog['products']
+    # Empata con el producto 2 (20%) en la misma categoría
+    products[4].discount_percentage = 20.0
+    db.session.commit()
+
+    assert winners(client)[0] == (categories[0].id, products[2].id)
+
+
+def test_inactive_and_out_of_stock_products_are_skipped(client, catalog):
+    categories, products = catalog['categories'], catalog['products']
+    products[2].is_active = False
+    products[5].stock = 0
+    db.session.commit()
+
+    assert winners(client) == [
+        (categories[0].id, products[4].id),
+        (categories[1].id, products[1].id),
+    ]
+
+    # Sin productos con descuento elegibles la categoría no aparece
+    products[4].stock = 0
+    db.session.commit()
+    cache.bump('stock')
+    assert winners(client) == [(categories[1].id, products[1].id)]
+
+
+def test_cached_result_changes_after_stock_bump_and_discount_write(client, catalog):
+    categories, products = catalog['categories'], catalog['products']
+    admin = catalog['users'][0]
+    assert winners(client)[1] == (categories[1].id, products[5].id)
+
+    products[5].stock = 0
+    db.session.commit()
+    # Sin bump sigue la respuesta guardada
+    assert winners(client)[1] == (categories[1].id, products[5].id)
+
+    cache.bump('stock')
+    assert winners(client)[1] == (categories[1].id, products[1].id)
+
+    response = client.put(
+        f'/api/products/{products[3].id}', json={'discount_percentage': 50}, headers=auth_headers(admin.id)
+    )
+    assert response.status_code == 200
+    assert winners(client)[1] == (categories[1].id, products[3].id)